@@ -0,0 +1,35 @@
+'''Time TileLayout.tile_plane_parallel against tile_plane with an increasing
+number of worker processes.  The speedup is limited by the number of CPUs.
+
+Run from the repository root with: python -m benchmarks.bench_parallel
+'''
+import os
+import timeit
+
+from hyperbolic.tiles import TileGen, TileLayout, TileSet
+
+
+def main(p=7, q=3, depth=8):
+    layout = TileLayout()
+    layout.add_generator(TileGen.make_regular(p, q=q), (0,)*p)
+    start = layout.default_start_tile()
+    t_serial = min(timeit.repeat(
+            lambda: layout.tile_plane(start, depth, out=TileSet()),
+            number=1, repeat=3))
+    n = len(layout.tile_plane(start, depth))
+    print('{{{},{}}} tiling, depth {}, {} tiles, {} CPUs'.format(
+            p, q, depth, n, os.cpu_count()))
+    print('workers   seconds   speedup')
+    print('{:>7} {:9.2f} {:9.2f}'.format('serial', t_serial, 1))
+    workers = 2
+    while workers <= 2 * (os.cpu_count() or 1):
+        t = min(timeit.repeat(
+                lambda: layout.tile_plane_parallel(start, depth,
+                                                   workers=workers),
+                number=1, repeat=3))
+        print('{:7} {:9.2f} {:9.2f}'.format(workers, t, t_serial / t))
+        workers *= 2
+
+
+if __name__ == '__main__':
+    main()
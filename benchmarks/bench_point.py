@@ -0,0 +1,62 @@
+'''Compare the memory and construction time of Point with an eager,
+dict-based point like the one it replaced.
+
+Run from the repository root with: python -m benchmarks.bench_point
+'''
+import math
+import timeit
+import tracemalloc
+
+from hyperbolic.poincare import Point
+from hyperbolic.tiles import TileGen, TileLayout
+
+
+class EagerPoint:
+    '''The previous Point: a __dict__ and polar coordinates computed in
+    __init__.
+    '''
+    def __init__(self, x, y, hr=None, theta=None):
+        self.x = x
+        self.y = y
+        if theta is None:
+            theta = math.atan2(y, x)
+        if hr is None:
+            hr = 2 * math.atanh(math.hypot(x, y))
+        self.theta = theta
+        self.hr = hr
+
+
+def bytes_per_point(cls, n=100000):
+    tracemalloc.start()
+    points = [cls(0.1 + i*1e-7, 0.2) for i in range(n)]
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del points
+    return size / n
+
+
+def construct_time(cls, n=100000):
+    return min(timeit.repeat(
+            lambda: [cls(0.1 + i*1e-7, 0.2) for i in range(n)],
+            number=1, repeat=5))
+
+
+def tile_plane_time(depth=5):
+    gen = TileGen.make_regular(7, q=3)
+    layout = TileLayout()
+    layout.add_generator(gen, (0,)*7)
+    start = layout.default_start_tile()
+    return min(timeit.repeat(lambda: layout.tile_plane(start, depth=depth),
+                             number=1, repeat=3))
+
+
+def main():
+    for cls in (EagerPoint, Point):
+        print('{:12} {:6.1f} bytes/point  {:6.1f} ms per 100k points'.format(
+                cls.__name__, bytes_per_point(cls), construct_time(cls)*1e3))
+    print('tile_plane {{7,3}} depth 5: {:.1f} ms'.format(
+            tile_plane_time()*1e3))
+
+
+if __name__ == '__main__':
+    main()
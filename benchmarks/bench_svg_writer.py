@@ -0,0 +1,68 @@
+'''Time, peak memory, and file size of writing a tiling to an SVG file
+with drawsvg.Drawing, with SvgWriter, and with SvgWriter's compact options.
+Tiles are generated by
+TileLayout.iter_tiles while they are written, and the memory includes its
+frontier.
+
+Run from the repository root with: python -m benchmarks.bench_svg_writer
+'''
+import os
+import tempfile
+import time
+import tracemalloc
+
+import drawsvg as draw
+
+from hyperbolic.svg_writer import SvgWriter
+from hyperbolic.tiles import TileDecoratorOffset, TileGen, TileLayout
+
+
+def render_drawsvg(layout, start, depth, path):
+    d = draw.Drawing(2.1, 2.1, origin='center')
+    for tile in layout.iter_tiles(start, depth):
+        d.draw(tile, hwidth=0.01, fill='black')
+    d.save_svg(path)
+
+def render_writer(layout, start, depth, path):
+    with SvgWriter(path, 2.1, 2.1, origin='center') as writer:
+        writer.draw_tiles(layout.iter_tiles(start, depth), hwidth=0.01,
+                          fill='black')
+
+def render_compact(layout, start, depth, path):
+    with SvgWriter(path, 2.1, 2.1, origin='center', precision=4,
+                   relative=True, share_styles=True,
+                   merge_paths=True) as writer:
+        writer.draw_tiles(layout.iter_tiles(start, depth), hwidth=0.01,
+                          fill='black')
+
+def main(p=7, q=3):
+    layout = TileLayout()
+    layout.add_generator(TileGen.make_regular(p, q=q), (0,)*p,
+                         TileDecoratorOffset(0.02))
+    start = layout.default_start_tile()
+    print(f'{{{p},{q}}} tiling')
+    renders = (render_drawsvg, render_writer, render_compact)
+    print(f'{"":13}' + ''.join(f'{col:^36}' for col in (
+            'time (s)', 'peak memory (MB)', 'file size (MB)')))
+    print('depth   tiles' + '     drawsvg      writer     compact'*3)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'tiles.svg')
+        for depth in (4, 6, 8):
+            n = sum(1 for _ in layout.iter_tiles(start, depth))
+            results = []
+            for render in renders:
+                t = time.perf_counter()
+                render(layout, start, depth, path)
+                t = time.perf_counter() - t
+                # Tracing slows rendering so measure memory separately
+                tracemalloc.start()
+                render(layout, start, depth, path)
+                peak = tracemalloc.get_traced_memory()[1] / 2**20
+                tracemalloc.stop()
+                results.append((t, peak, os.path.getsize(path) / 2**20))
+            print(f'{depth:5} {n:7}' + ''.join(
+                    f' {r[i]:11.2f}' for i in range(3) for r in results))
+
+
+if __name__ == '__main__':
+    main()
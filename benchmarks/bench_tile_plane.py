@@ -0,0 +1,95 @@
+'''Time TileLayout.tile_plane at increasing depth to check that it scales
+linearly with the number of tiles, and compare with the previous list-based
+version that compared edges with Edge.__eq__ and used list.pop(0), with the
+original tile_plane (the list-based version with the original tile
+placement), and with iter_regular_tiles, which compares no geometry.
+
+Run from the repository root with: python -m benchmarks.bench_tile_plane
+'''
+import timeit
+
+from hyperbolic.poincare import Transform
+from hyperbolic.tiles import TileGen, TileLayout
+
+
+def baseline_place_tile(layout, edge):
+    '''TileLayout.place_tile before placement rules were compiled.'''
+    code = edge.code
+    gen_index = layout.calc_gen_index(code)
+    tile_gen, default_codes, decorator = layout.gen_list[gen_index][0:3]
+    touch_side = layout.calc_tile_touch_side(code, gen_index)
+    side_codes = layout.calc_side_codes(
+            code, gen_index, touch_side, default_codes)
+    trans = Transform.translation(edge.p2, edge.p1)
+    if touch_side != 0:
+        vertices = tile_gen.corner_tile.vertices
+        trans = Transform.merge(Transform.shift_origin(
+                vertices[touch_side],
+                vertices[(touch_side+1)%len(vertices)]), trans)
+    tile = tile_gen.tile_with_transform(trans)
+    tile.touching_side = touch_side
+    tile.set_side_codes(side_codes)
+    tile.decorator = decorator
+    return tile
+
+
+def list_tile_plane(layout, start_tile, depth,
+                    place_tile=TileLayout.place_tile):
+    tiles = [start_tile]
+    boundary = list(start_tile.sides)
+    for j in range(depth):
+        boundary2 = []
+        i = 0
+        while i < len(boundary):
+            tile = place_tile(layout, boundary[i])
+            tiles.append(tile)
+            sides = tile.permuted_sides()
+            o = 1
+            p = len(sides)
+            if i == 0:
+                if sides[o] == boundary[-1]:
+                    o += 1
+                    boundary.pop()
+            else:
+                if sides[o] == boundary2[-1]:
+                    o += 1
+                    boundary2.pop()
+                if sides[p-1] == boundary[(i + 1) % len(boundary)]:
+                    p -= 1
+                    i += 1
+                if sides[p-1] == boundary2[0]:
+                    p -= 1
+                    boundary2.pop(0)
+            boundary2.extend(sides[o:p])
+            i += 1
+        boundary = boundary2
+    return tiles
+
+
+def run(func, *args, repeat=3):
+    return func(*args), min(timeit.repeat(
+            lambda: func(*args), number=1, repeat=repeat))
+
+
+def main(p=7, q=3, max_depth=9):
+    layout = TileLayout()
+    layout.add_generator(TileGen.make_regular(p, q=q), (0,)*p)
+    start = layout.default_start_tile()
+    print('{{{},{}}} tiling'.format(p, q))
+    print('depth   tiles   hashed us/tile   list us/tile   '
+          'original us/tile   regular us/tile')
+    for depth in range(3, max_depth+1):
+        tiles, t_hash = run(layout.tile_plane, start, depth)
+        _, t_list = run(list_tile_plane, layout, start, depth)
+        _, t_original = run(list_tile_plane, layout, start, depth,
+                            baseline_place_tile)
+        _, t_regular = run(
+                lambda: list(layout.iter_regular_tiles(start, depth)))
+        n = len(tiles)
+        print('{:5} {:7} {:16.1f} {:14.1f} {:18.1f} {:17.1f}'.format(
+                depth, n, t_hash/n*1e6, t_list/n*1e6, t_original/n*1e6,
+                t_regular/n*1e6))
+
+
+if __name__ == '__main__':
+    main()
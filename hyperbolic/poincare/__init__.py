@@ -1,8 +1,13 @@
 from . import util
 from .point import Point, Ideal
+from .point_array import PointArray
 from .line import Line
 from .hypercycle import Hypercycle
 from .horocycle import Horocycle
 from .circle import Circle
 from .polygon import Polygon
 from .transform import Transform
+from .transform_stack import TransformStack
+from . import lorentz
+from .distance import distance_matrix, nearest_neighbors
+from .vptree import VPTree
@@ -0,0 +1,147 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from . import PointArray
+
+
+# Default upper bound on the number of distances computed in one block.
+# This bounds the temporary memory used by distance_matrix and
+# nearest_neighbors regardless of the number of points.
+max_chunk_elements = 2**20
+
+
+def _as_complex(points):
+    if isinstance(points, PointArray):
+        return points.z
+    if isinstance(points, np.ndarray):
+        return PointArray(points).z
+    return PointArray.from_points(points).z
+
+def _prepare(points):
+    z = _as_complex(points)
+    # 1 - |z|**2 is the inverse of the conformal factor of the disk
+    return z, 1 - (z.real**2 + z.imag**2)
+
+def _distance_block(z1, w1, z2, w2):
+    # cosh(d) = 1 + 2|z1-z2|**2 / ((1-|z1|**2)(1-|z2|**2)), rewritten as
+    # sinh(d/2) = |z1-z2| / sqrt((1-|z1|**2)(1-|z2|**2)) to avoid cancellation
+    block = np.abs(z1[:, np.newaxis] - z2[np.newaxis, :])
+    with np.errstate(divide='ignore'):
+        block /= np.sqrt(w1[:, np.newaxis] * w2[np.newaxis, :])
+    return 2 * np.arcsinh(block, out=block)
+
+def _tiles(n_rows, n_cols, chunk_size):
+    if chunk_size is None:
+        chunk_size = max_chunk_elements
+    cols = max(1, min(n_cols, chunk_size))
+    rows = max(1, chunk_size // cols)
+    return [(i0, min(i0+rows, n_rows), j0, min(j0+cols, n_cols))
+            for i0 in range(0, n_rows, rows)
+            for j0 in range(0, n_cols, cols)]
+
+def _run_chunks(func, chunks, workers):
+    if workers is None or workers <= 1 or len(chunks) <= 1:
+        for chunk in chunks:
+            func(*chunk)
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            # Consume the results to raise any exceptions
+            for _ in executor.map(lambda chunk: func(*chunk), chunks):
+                pass
+
+def distance_matrix(points1, points2=None, condensed=False, out=None,
+                    filename=None, chunk_size=None, workers=None,
+                    dtype=np.float64):
+    '''Return the matrix of hyperbolic distances between two sets of points.
+
+    Points may be a PointArray, a complex array, an (N, 2) float array, or a
+    list of Points.  If points2 is None, the distances between points1 and
+    itself are computed and condensed=True returns only the upper triangle as
+    a flat array (in the same order as scipy.spatial.distance.pdist).
+
+    The work is split into blocks of at most chunk_size distances so
+    temporary memory stays bounded.  The result is written into out if given,
+    or else into a new memory-mapped file if filename is given.  Pass workers
+    to compute blocks in parallel with a thread pool.
+    '''
+    z1, w1 = _prepare(points1)
+    z2, w2 = (z1, w1) if points2 is None else _prepare(points2)
+    n, m = len(z1), len(z2)
+    if condensed:
+        if points2 is not None:
+            raise ValueError('condensed requires a single set of points')
+        shape = (n*(n-1)//2,)
+    else:
+        shape = (n, m)
+    if out is None:
+        if filename is not None:
+            out = np.memmap(filename, dtype=dtype, mode='w+', shape=shape)
+        else:
+            out = np.empty(shape, dtype=dtype)
+    elif out.shape != shape:
+        raise ValueError('Expected out to have shape {}'.format(shape))
+    if condensed:
+        def compute(i0, i1, j0, j1):
+            if j1 <= i0 + 1:
+                return  # Block is entirely on or below the diagonal
+            block = _distance_block(z1[i0:i1], w1[i0:i1], z2[j0:j1], w2[j0:j1])
+            for i in range(i0, min(i1, j1-1)):
+                c0 = max(j0, i+1)
+                start = n*i - i*(i+1)//2 + c0 - i - 1
+                out[start:start+j1-c0] = block[i-i0, c0-j0:]
+    else:
+        def compute(i0, i1, j0, j1):
+            out[i0:i1, j0:j1] = _distance_block(
+                    z1[i0:i1], w1[i0:i1], z2[j0:j1], w2[j0:j1])
+    _run_chunks(compute, _tiles(n, m, chunk_size), workers)
+    return out
+
+def nearest_neighbors(queries, points=None, k=1, chunk_size=None,
+                      workers=None):
+    '''Return the k nearest points to each query point.
+
+    Returns (indices, distances), each with shape (N, k) and sorted by
+    distance.  If points is None, each query point is matched against the
+    other query points (excluding itself).  The full distance matrix is never
+    stored; see distance_matrix for the meaning of chunk_size and workers.
+    '''
+    zq, wq = _prepare(queries)
+    exclude_self = points is None
+    zp, wp = (zq, wq) if exclude_self else _prepare(points)
+    n, m = len(zq), len(zp)
+    if not 0 < k <= m - exclude_self:
+        raise ValueError('k must be between 1 and the number of points')
+    indices = np.empty((n, k), dtype=np.intp)
+    distances = np.empty((n, k), dtype=np.float64)
+    tiles = _tiles(n, m, chunk_size)
+    row_chunks = sorted({(i0, i1) for i0, i1, _, _ in tiles})
+    col_chunks = sorted({(j0, j1) for _, _, j0, j1 in tiles})
+    def compute(i0, i1):
+        best_key = np.full((i1-i0, 0), np.inf)
+        best_idx = np.empty((i1-i0, 0), dtype=np.intp)
+        for j0, j1 in col_chunks:
+            # Rank by |q-z|**2 / (1-|z|**2), which is increasing with distance
+            # for a fixed query and skips the arcsinh
+            key = np.abs(zq[i0:i1, np.newaxis] - zp[np.newaxis, j0:j1])**2
+            with np.errstate(divide='ignore'):
+                key /= wp[np.newaxis, j0:j1]
+            if exclude_self:
+                rows = np.arange(max(i0, j0), min(i1, j1))
+                key[rows-i0, rows-j0] = np.inf
+            key = np.concatenate((best_key, key), axis=1)
+            idx = np.concatenate((best_idx, np.broadcast_to(
+                    np.arange(j0, j1), (i1-i0, j1-j0))), axis=1)
+            if key.shape[1] > k:
+                sel = np.argpartition(key, k-1, axis=1)[:, :k]
+                key = np.take_along_axis(key, sel, axis=1)
+                idx = np.take_along_axis(idx, sel, axis=1)
+            best_key, best_idx = key, idx
+        order = np.argsort(best_key, axis=1, kind='stable')
+        best_key = np.take_along_axis(best_key, order, axis=1)
+        indices[i0:i1] = np.take_along_axis(best_idx, order, axis=1)
+        with np.errstate(divide='ignore'):
+            distances[i0:i1] = 2 * np.arcsinh(np.sqrt(
+                    best_key / wq[i0:i1, np.newaxis]))
+    _run_chunks(compute, row_chunks, workers)
+    return indices, distances
@@ -0,0 +1,161 @@
+import numpy as np
+
+from . import PointArray, Transform, TransformStack
+
+
+# Points in the hyperboloid (Lorentz) model are stored in the last axis of
+# float arrays as (t, x, y) on the sheet t**2 - x**2 - y**2 = 1, t > 0.
+dtype = np.float64
+
+
+def minkowski_dot(u, v):
+    '''Return the Minkowski inner product -t1*t2 + x1*x2 + y1*y2 along the
+    last axis.
+    '''
+    u = np.asarray(u, dtype)
+    v = np.asarray(v, dtype)
+    return -u[..., 0]*v[..., 0] + u[..., 1]*v[..., 1] + u[..., 2]*v[..., 2]
+
+def _as_complex(points):
+    if isinstance(points, PointArray):
+        return points.z
+    points = np.asarray(points)
+    if np.iscomplexobj(points):
+        return points
+    points = np.asarray(points, dtype)
+    return points[..., 0] + 1j*points[..., 1]
+
+def from_disk(points):
+    '''Convert Poincare disk points to the hyperboloid model.
+
+    Accepts a PointArray, a complex array, or a float array with x, y in the
+    last axis.  Returns an array with (t, x, y) in the last axis.  Ideal points
+    map to infinity.
+    '''
+    z = _as_complex(points)
+    r2 = z.real**2 + z.imag**2
+    with np.errstate(divide='ignore', invalid='ignore'):
+        s = 1 / (1 - r2)
+    out = np.empty(z.shape + (3,), dtype)
+    out[..., 0] = (1 + r2) * s
+    out[..., 1] = 2 * z.real * s
+    out[..., 2] = 2 * z.imag * s
+    return out
+
+def to_disk(points):
+    '''Convert hyperboloid points to a complex array of Poincare disk points.
+
+    Wrap the result with PointArray to use the Point API.
+    '''
+    points = np.asarray(points, dtype)
+    return (points[..., 1] + 1j*points[..., 2]) / (1 + points[..., 0])
+
+def from_h_polar(hr, theta):
+    '''Create hyperboloid points from hyperbolic polar coordinates.
+
+    Unlike the Poincare disk, this stays accurate for large hr.
+    '''
+    hr, theta = np.broadcast_arrays(np.asarray(hr, dtype),
+                                    np.asarray(theta, dtype))
+    out = np.empty(hr.shape + (3,), dtype)
+    sinh = np.sinh(hr)
+    out[..., 0] = np.cosh(hr)
+    out[..., 1] = sinh * np.cos(theta)
+    out[..., 2] = sinh * np.sin(theta)
+    return out
+
+def to_h_polar(points):
+    '''Return the hyperbolic polar coordinates (hr, theta) of hyperboloid
+    points.
+    '''
+    points = np.asarray(points, dtype)
+    x, y = points[..., 1], points[..., 2]
+    return np.arcsinh(np.hypot(x, y)), np.arctan2(y, x)
+
+def normalize(points):
+    '''Project points back onto the hyperboloid by recomputing t from x, y.
+
+    Use this to remove accumulated rounding error.
+    '''
+    out = np.array(points, dtype)
+    out[..., 0] = np.sqrt(1 + out[..., 1]**2 + out[..., 2]**2)
+    return out
+
+def _distance_from_polar(r1, t1, r2, t2):
+    # sinh(d/2)**2 = sinh((r1-r2)/2)**2 + sinh(r1)*sinh(r2)*sin((t1-t2)/2)**2
+    # has no cancellation, unlike acosh(-<u, v>)
+    s = (np.sinh((r1-r2)/2)**2
+         + np.sinh(r1) * np.sinh(r2) * np.sin((t1-t2)/2)**2)
+    return 2 * np.arcsinh(np.sqrt(s))
+
+def distance(u, v):
+    '''Return the hyperbolic distance between corresponding points of u and v.
+
+    Follows numpy broadcasting rules.  Only x and y are used so the result
+    stays accurate far from the origin and for nearby points.
+    '''
+    r1, t1 = to_h_polar(u)
+    r2, t2 = to_h_polar(v)
+    return _distance_from_polar(r1, t1, r2, t2)
+
+def pairwise_distance(u, v=None):
+    '''Return the (N, M) matrix of distances between every point of u and v.
+    '''
+    r1, t1 = to_h_polar(u)
+    r2, t2 = (r1, t1) if v is None else to_h_polar(v)
+    return _distance_from_polar(r1[:, np.newaxis], t1[:, np.newaxis],
+                                r2[np.newaxis, :], t2[np.newaxis, :])
+
+def midpoint(u, v, frac=0.5):
+    '''Return the point frac of the way along the geodesic from u to v.'''
+    u = np.asarray(u, dtype)
+    v = np.asarray(v, dtype)
+    d = distance(u, v)[..., np.newaxis]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        w1 = np.sinh((1-frac)*d) / np.sinh(d)
+        w2 = np.sinh(frac*d) / np.sinh(d)
+    zero = d == 0
+    w1 = np.where(zero, 1, w1)
+    w2 = np.where(zero, 0, w2)
+    return normalize(w1*u + w2*v)
+
+# Hermitian matrices that represent the t, x, and y axes
+_basis = np.array([
+    [[0.5, 0], [0, 0.5]],
+    [[0, 0.5], [0.5, 0]],
+    [[0, 0.5j], [-0.5j, 0]],
+], dtype=np.complex128)
+
+def transform_matrix(trans):
+    '''Return the Lorentz matrix equivalent to a disk isometry.
+
+    trans may be a Transform, giving a (3, 3) matrix, or a TransformStack,
+    giving an (N, 3, 3) array.  Apply a matrix to points with
+    points @ matrix.T or with apply_matrix().
+    '''
+    stack = (TransformStack.from_transform(trans)
+             if isinstance(trans, Transform) else trans)
+    if np.any(stack.drift() > Transform.isometry_tolerance):
+        raise ValueError('Transform is not an isometry of the unit disk')
+    g = stack.normalized().mats
+    # Act on the point v v^H, where v = (z, 1) / sqrt(1 - |z|**2)
+    m = g[:, np.newaxis] @ _basis @ g.conj().swapaxes(-1, -2)[:, np.newaxis]
+    mats = np.empty((len(g), 3, 3), dtype)
+    mats[:, 0, :] = (m[..., 0, 0] + m[..., 1, 1]).real
+    mats[:, 1, :] = 2 * m[..., 0, 1].real
+    mats[:, 2, :] = 2 * m[..., 0, 1].imag
+    # Reflect y before applying the transform if conj is set
+    mats[stack.conj, :, 2] *= -1
+    if isinstance(trans, Transform):
+        return mats[0]
+    return mats
+
+def apply_matrix(mats, points):
+    '''Apply a (3, 3) Lorentz matrix to every point, or an (N, 3, 3) stack
+    of matrices to N corresponding points.
+    '''
+    mats = np.asarray(mats, dtype)
+    points = np.asarray(points, dtype)
+    if mats.ndim == 2:
+        return points @ mats.T
+    return np.einsum('nij,nj->ni', mats, points)
@@ -6,20 +6,28 @@ from . import circle
 
 
 class Point:
+    __slots__ = ('x', 'y', 'hr', 'theta')
     def __init__(self, x, y, hr=None, theta=None):
         self.x = x
         self.y = y
-        # Hyperbolic polar coordinates
-        if theta is None:
-            theta = math.atan2(y, x)
-        if hr is None:
-            r = math.hypot(x, y)
+        # Hyperbolic polar coordinates are computed by __getattr__ on first use
+        if hr is not None:
+            self.hr = hr
+        if theta is not None:
+            self.theta = theta
+    def __getattr__(self, name):
+        # Only called when a slot has not been set
+        if name == 'theta':
+            self.theta = math.atan2(self.y, self.x)
+            return self.theta
+        if name == 'hr':
             if self.is_ideal():
-                hr = float('inf')
+                self.hr = float('inf')
             else:
-                hr = 2 * math.atanh(r)
-        self.theta = theta
-        self.hr = hr
+                self.hr = 2 * math.atanh(math.hypot(self.x, self.y))
+            return self.hr
+        raise AttributeError('{!r} object has no attribute {!r}'.format(
+                type(self).__name__, name))
     def __iter__(self):
         return iter((self.x, self.y))
     def __getitem__(self, i):
@@ -90,14 +98,17 @@ class Point:
 
 
 class Ideal(Point):
+    __slots__ = ()
     def __init__(self, theta):
         self.theta = theta % (2*math.pi)
-    @property
-    def x(self):
-        return math.cos(self.theta)
-    @property
-    def y(self):
-        return math.sin(self.theta)
+        self.hr = float('inf')
+    def __getattr__(self, name):
+        # x and y are computed on first use
+        if name == 'x' or name == 'y':
+            self.x = math.cos(self.theta)
+            self.y = math.sin(self.theta)
+            return getattr(self, name)
+        return super().__getattr__(name)
     def is_ideal(self):
         return True
     @classmethod
@@ -0,0 +1,153 @@
+import math
+
+import numpy as np
+
+from .. import util
+from .point import Point, Ideal
+
+
+class PointArray:
+    '''An array of Poincare disk points backed by a complex numpy array.
+
+    Use this instead of a list of Point objects when working with many points
+    at once.  The hyperbolic polar coordinates are computed lazily for the
+    whole array.  Indexing with an integer returns a Point (or Ideal) and
+    indexing with a slice, mask, or index array returns a new PointArray.
+    '''
+    def __init__(self, z, hr=None, theta=None):
+        z = np.asarray(z)
+        if not np.iscomplexobj(z):
+            z = np.asarray(z, dtype=np.float64)
+            if z.ndim != 2 or z.shape[1] != 2:
+                raise ValueError(
+                        'Expected a complex array or a float array with '
+                        'shape (N, 2)')
+            z = np.ascontiguousarray(z).view(np.complex128)[:, 0]
+        else:
+            z = np.asarray(z, dtype=np.complex128)
+        if z.ndim == 0:
+            z = z.reshape(1)
+        elif z.ndim != 1:
+            raise ValueError('Expected a one-dimensional array of points')
+        self.z = z
+        self._hr = None if hr is None else np.asarray(hr, dtype=np.float64)
+        self._theta = (None if theta is None
+                       else np.asarray(theta, dtype=np.float64))
+    @property
+    def x(self):
+        return self.z.real
+    @property
+    def y(self):
+        return self.z.imag
+    @property
+    def xy(self):
+        '''An (N, 2) float64 view of the coordinates.'''
+        z = np.ascontiguousarray(self.z)
+        return z.view(np.float64).reshape(len(z), 2)
+    @property
+    def er(self):
+        '''Euclidean distance of each point from the origin.'''
+        return np.abs(self.z)
+    @property
+    def theta(self):
+        if self._theta is None:
+            self._theta = np.angle(self.z)
+        return self._theta
+    @property
+    def hr(self):
+        '''Hyperbolic distance of each point from the origin.
+
+        Ideal points have an infinite distance.
+        '''
+        if self._hr is None:
+            r = np.abs(self.z)
+            ideal = self.is_ideal()
+            with np.errstate(divide='ignore', invalid='ignore'):
+                hr = 2 * np.arctanh(np.where(ideal, 0, r))
+            hr[ideal] = np.inf
+            self._hr = hr
+        return self._hr
+    def is_ideal(self):
+        '''Return a boolean mask of the points on the unit circle.'''
+        return np.abs(np.abs(self.z) - 1) <= util.epsilon
+    def __len__(self):
+        return len(self.z)
+    def __iter__(self):
+        for i in range(len(self.z)):
+            yield self[i]
+    def __getitem__(self, i):
+        if isinstance(i, (int, np.integer)):
+            z = complex(self.z[i])
+            theta = None if self._theta is None else float(self._theta[i])
+            if util.near_zero(abs(z) - 1):
+                if theta is None:
+                    theta = math.atan2(z.imag, z.real)
+                return Ideal(theta)
+            hr = None if self._hr is None else float(self._hr[i])
+            return Point(z.real, z.imag, hr=hr, theta=theta)
+        return PointArray(
+                self.z[i],
+                hr=None if self._hr is None else self._hr[i],
+                theta=None if self._theta is None else self._theta[i])
+    def __repr__(self):
+        return '{}({})'.format(type(self).__name__, len(self))
+    def to_list(self):
+        '''Convert to a list of Point and Ideal objects.'''
+        return list(self)
+    def copy(self):
+        return PointArray(
+                self.z.copy(),
+                hr=None if self._hr is None else self._hr.copy(),
+                theta=None if self._theta is None else self._theta.copy())
+    @staticmethod
+    def from_points(points):
+        '''Create a PointArray from a list of Point objects or (x, y) tuples.
+        '''
+        if isinstance(points, PointArray):
+            return points
+        z = np.fromiter((complex(*p) for p in points), dtype=np.complex128,
+                        count=len(points))
+        return PointArray(z)
+    @staticmethod
+    def from_xy(x, y):
+        x, y = np.broadcast_arrays(np.asarray(x, dtype=np.float64),
+                                   np.asarray(y, dtype=np.float64))
+        return PointArray(x + 1j*y)
+    @staticmethod
+    def from_euclid(x, y):
+        '''Like Point.from_euclid but for arrays of coordinates.
+
+        Points within epsilon of the unit circle are snapped onto it.
+        '''
+        arr = PointArray.from_xy(x, y)
+        r = np.abs(arr.z)
+        ideal = np.abs(r - 1) <= util.epsilon
+        if np.any((r > 1) & ~ideal):
+            raise ValueError(
+                    'Euclidean coordinates are outside the unit circle')
+        arr.z[ideal] /= r[ideal]
+        return arr
+    @staticmethod
+    def from_polar_euclid(r, rad=None, deg=None):
+        assert (rad is None) != (deg is None)
+        if rad is None: rad = np.radians(deg)
+        r, rad = np.broadcast_arrays(np.asarray(r, dtype=np.float64),
+                                     np.asarray(rad, dtype=np.float64))
+        r = np.atleast_1d(r)
+        rad = np.atleast_1d(rad)
+        ideal = np.abs(r - 1) <= util.epsilon
+        if np.any((r > 1) & ~ideal):
+            raise ValueError(
+                    'Euclidean coordinates are outside the unit circle')
+        r = np.where(ideal, 1, r)
+        return PointArray(r * np.exp(1j*rad), theta=rad)
+    @staticmethod
+    def from_h_polar(hr, theta=None, deg=None):
+        assert (theta is None) != (deg is None)
+        if theta is None: theta = np.radians(deg)
+        hr, theta = np.broadcast_arrays(np.asarray(hr, dtype=np.float64),
+                                        np.asarray(theta, dtype=np.float64))
+        hr = np.atleast_1d(hr)
+        theta = np.atleast_1d(theta)
+        r = np.tanh(hr/2)
+        return PointArray(r * np.exp(1j*theta), hr=hr, theta=theta)
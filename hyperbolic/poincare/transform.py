@@ -2,11 +2,23 @@ import math, cmath
 import numpy as np
 
 from .. import util
-from ..euclid import Circle, Arc, Line, intersection
-from . import Point, Ideal
+from ..euclid import Circle, Arc, Line
+from . import Point, Ideal, PointArray
 
 
 class Transform:
+    # Set auto_normalize to True to renormalize the result of every merge.
+    # This keeps transforms built from deep compositions accurate.
+    auto_normalize = False
+    # Set drift_hook to a function f(transform, drift) to be notified of the
+    # drift (see Transform.drift) of the result of every merge, where
+    # transform is a Transform and drift a float.  TransformStack.merge calls
+    # TransformStack.drift_hook instead.
+    drift_hook = None
+    # Maximum drift of a transform that is still treated as a unit disk
+    # isometry by normalized()
+    isometry_tolerance = 1e-6
+
     def __init__(self, a,b,c,d,e=1,conj=False):
         self.abcd = a*e,b*e,c,d
         self.conj = conj
@@ -34,7 +46,34 @@ class Transform:
         if verify and not util.near_zero(math.hypot(x, y) - 1):
             raise ValueError('Invalid transform')
         return Ideal(math.atan2(y, x))
+    def apply_to_array(self, points, out=None):
+        '''Transform every point in a complex numpy array or PointArray.
+
+        Returns the same type as the input.  Pass out to write the result into
+        an existing complex array of the same shape (this may be the input
+        array).
+        '''
+        if isinstance(points, PointArray):
+            return PointArray(self.apply_to_array(points.z, out=out))
+        z = np.asarray(points, dtype=np.complex128)
+        if out is None:
+            out = np.empty(z.shape, dtype=np.complex128)
+        if self.conj:
+            z = np.conjugate(z)
+        a,b,c,d = self.abcd
+        denom = z * c
+        denom += d
+        np.multiply(z, a, out=out)
+        out += b
+        pole = np.abs(denom) <= util.epsilon
+        if pole.any():
+            # Match apply_to_tuple: scale the numerator instead of dividing
+            denom[pole] = 1e-5
+        out /= denom
+        return out
     def apply_to_list(self, points, verify=False):
+        if isinstance(points, PointArray):
+            return self.apply_to_array(points)
         if len(points) > 0:
             if isinstance(points[0], Ideal):
                 if verify:
@@ -49,34 +88,96 @@ class Transform:
     def apply_to_shape(self, shape):
         '''Transform a euclidean shape.
 
-        Supports euclidean Circle, Arc, and Line.
+        Supports euclidean Circle, Arc, and Line.  The shape is transformed as
+        a generalized circle (see apply_to_gcircle) so no points are sampled.
         '''
+        a, b, d = self.apply_to_gcircle(*self.shape_gcircle(shape))
         if isinstance(shape, (Arc, Line)):
-            closed = False
-            p1 = shape.start_point()
-            p2 = shape.midpoint()
-            p3 = shape.end_point()
-        elif isinstance(shape, Circle):
-            closed = True
+            p1 = self.apply_to_tuple(shape.start_point())
+            p3 = self.apply_to_tuple(shape.end_point())
+        else:
             p1 = shape.cx+shape.r, shape.cy
-            p2 = shape.cx, shape.cy+shape.r
             p3 = shape.cx-shape.r, shape.cy
             if not shape.cw:
                 p1, p3 = p3, p1
-        else:
-            raise TypeError('Unsupported shape: {}'.format(shape))
-        # Transform
-        p1, p2, p3 = self.apply_to_list((p1, p2, p3))
-        # Create shape
-        try:
-            # See if it is an arc or circle
-            out = Arc.from_points(*p1, *p3, *p2)
-            if closed:  # It's a circle
-                out = Circle(out.cx, out.cy, out.r, cw=out.cw)
-            return out
-        except (intersection.InfiniteIntersections, np.linalg.LinAlgError):
+            p1, p3 = self.apply_to_tuple(p1), self.apply_to_tuple(p3)
+        if abs(a) <= util.epsilon * abs(b):
             # It is a line
             return Line(*p1, *p3)
+        center = -b / a
+        r = math.sqrt(max(abs(b)**2 - a*d, 0)) / abs(a)
+        # The negative side is on the left (or on the right after a
+        # reflection) so travel is counterclockwise (increasing angles,
+        # cw=True) if it is inside the circle
+        cw = (a > 0) != self.conj
+        if isinstance(shape, (Arc, Line)):
+            return Arc(center.real, center.imag, r,
+                       math.degrees(math.atan2(p1[1]-center.imag,
+                                               p1[0]-center.real)),
+                       math.degrees(math.atan2(p3[1]-center.imag,
+                                               p3[0]-center.real)),
+                       cw=cw)
+        return Circle(center.real, center.imag, r, cw=cw)
+    def apply_to_gcircle(self, a, b, d):
+        '''Transform the generalized circle a*|z|**2 + 2*Re(conj(b)*z) + d = 0
+        where a and d are real.
+
+        Returns the coefficients (a, b, d) of the image.  A point where the
+        left side is negative maps to a point where the image's left side is
+        negative.  Circles have a != 0 with center -b/a and lines have a = 0.
+        Works elementwise on numpy arrays of coefficients.
+        '''
+        if self.conj:
+            b = b.conjugate()
+        return self._gcircle_image(*self.abcd, a, b, d)
+    @staticmethod
+    def shape_gcircle(shape):
+        '''Return the coefficients (a, b, d) of the generalized circle through
+        a euclidean Circle, Arc, or Line (see apply_to_gcircle).
+
+        The left side of the direction of travel is negative.
+        '''
+        if isinstance(shape, Line):
+            p1 = complex(shape.x1, shape.y1)
+            p2 = complex(shape.x2, shape.y2)
+            b = (p2 - p1) * -1j
+            return 0, b, -2 * (b.conjugate() * p1).real
+        elif isinstance(shape, Circle):
+            sign = 1 if shape.cw else -1
+            center = complex(shape.cx, shape.cy)
+            return sign, -sign*center, sign*(abs(center)**2 - shape.r**2)
+        raise TypeError('Unsupported shape: {}'.format(shape))
+    @staticmethod
+    def _gcircle_image(p, q, r, s, a, b, d):
+        # With v = (z, 1), the left side is conj(v) @ C @ v where
+        # C = [[a, b], [conj(b), d]].  The image under M = [[p, q], [r, s]]
+        # is adj(M)^H @ C @ adj(M).
+        # Works for python and numpy numbers
+        bs, bq = b * s.conjugate(), b * q.conjugate()
+        a2 = a*abs(s)**2 - 2*(bs*r).real + d*abs(r)**2
+        b2 = (-a*s.conjugate()*q + bs*p + (b*r).conjugate()*q
+              - d*r.conjugate()*p)
+        d2 = a*abs(q)**2 - 2*(bq*p).real + d*abs(p)**2
+        return a2, b2, d2
+    def apply_to_circle(self, center, r):
+        '''Transform a euclidean circle given as a complex center and radius.
+
+        Returns the (center, radius) of the image circle or None if the circle
+        contains the pole, so its image is a line or the outside of a circle.
+        '''
+        if self.conj:
+            center = center.conjugate()
+        a,b,c,d = self.abcd
+        if util.near_zero(abs(c)):
+            return (a*center + b) / d, abs(a/d) * r
+        # z -> c*z + d, then 1/z, then scale and shift
+        m = c*center + d
+        r *= abs(c)
+        denom = abs(m)**2 - r**2
+        if denom <= 0:
+            return None
+        k = (b*c - a*d) / c
+        return a/c + k * m.conjugate() / denom, abs(k) * r / denom
     def __call__(self, *points, verify=False):
         return self.apply_to_list(points, verify=verify)
     def inverted(self):
@@ -88,11 +189,52 @@ class Transform:
         a, b, c, d = self.abcd
         return Transform(a.conjugate(), b.conjugate(),
                          c.conjugate(), d.conjugate(), conj=not self.conj)
+    def _unit_det_coefficients(self):
+        a,b,c,d = self.abcd
+        det = a*d - b*c
+        if det == 0:
+            raise ValueError('Transform is singular')
+        s = cmath.sqrt(det)
+        return a/s, b/s, c/s, d/s
+    def drift(self):
+        '''Return the relative distance of the coefficients from an exact
+        isometry of the unit disk.
+
+        The result does not depend on the scale of abcd.  It is zero (up to
+        rounding) for transforms that map the unit disk to itself and grows as
+        error accumulates from composing many transforms.
+        '''
+        try:
+            a,b,c,d = self._unit_det_coefficients()
+        except ValueError:
+            return float('inf')
+        return ((abs(a - d.conjugate()) + abs(b - c.conjugate()))
+                / (abs(a) + abs(b)))
+    def normalized(self):
+        '''Return an equivalent transform with canonical coefficients.
+
+        The coefficients are scaled so the determinant is one and the sign is
+        chosen so a has a non-negative real part.  If the transform maps the
+        unit disk to itself (drift() is at most isometry_tolerance), it is also
+        projected onto the form d = conj(a), c = conj(b) (the group SU(1,1)),
+        which removes error accumulated by composition.
+        '''
+        a,b,c,d = self._unit_det_coefficients()
+        if ((abs(a - d.conjugate()) + abs(b - c.conjugate()))
+                <= self.isometry_tolerance * (abs(a) + abs(b))):
+            a = (a + d.conjugate()) / 2
+            b = (b + c.conjugate()) / 2
+            n = math.sqrt(abs(a)**2 - abs(b)**2)
+            a, b = a/n, b/n
+            c, d = b.conjugate(), a.conjugate()
+        if a.real < 0 or (a.real == 0 and a.imag < 0):
+            a,b,c,d = -a,-b,-c,-d
+        return Transform(a,b,c,d,conj=self.conj)
     @staticmethod
     def identity():
         return Transform(1,0,0,1,1)
     @staticmethod
-    def merge(*transfoms):
+    def merge(*transfoms, normalize=None):
         a,b,c,d = 1,0,0,1
         conj = False
         for i, trans in enumerate(transfoms):
@@ -102,7 +244,14 @@ class Transform:
                         d.conjugate())
                 conj = not conj
             a,b,c,d = a*a2+c*b2, b*a2+d*b2, a*c2+c*d2, b*c2+d*d2
-        return Transform(a,b,c,d,conj=conj)
+        trans = Transform(a,b,c,d,conj=conj)
+        if Transform.drift_hook is not None:
+            Transform.drift_hook(trans, trans.drift())
+        if normalize is None:
+            normalize = Transform.auto_normalize
+        if normalize:
+            trans = trans.normalized()
+        return trans
     @staticmethod
     def shift_origin(new_origin, new_x=None):
         z0 = complex(*new_origin)
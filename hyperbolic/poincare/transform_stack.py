@@ -0,0 +1,190 @@
+import numpy as np
+
+from .. import util
+from . import PointArray, Transform
+
+
+class TransformStack:
+    '''A stack of N transforms stored as an (N, 2, 2) complex array of
+    [[a, b], [c, d]] matrices and a length N boolean array of conj flags.
+
+    The methods mirror Transform but operate element-wise on the whole stack so
+    many transforms can be composed, inverted, or applied with a few numpy
+    calls.
+    '''
+    # Set drift_hook to a function f(stack, drift) to be notified of the
+    # drift of the result of every merge, where stack is a TransformStack
+    # and drift an array with the drift of each transform (see drift).
+    drift_hook = None
+    def __init__(self, mats, conj=None):
+        mats = np.asarray(mats, dtype=np.complex128)
+        if mats.ndim == 2:
+            mats = mats[np.newaxis]
+        if mats.ndim != 3 or mats.shape[1:] != (2, 2):
+            raise ValueError('Expected an array of matrices with shape (N, 2, 2)')
+        if conj is None:
+            conj = np.zeros(len(mats), dtype=bool)
+        else:
+            conj = np.broadcast_to(
+                    np.asarray(conj, dtype=bool), (len(mats),)).copy()
+        self.mats = mats
+        self.conj = conj
+    def __len__(self):
+        return len(self.mats)
+    def __iter__(self):
+        for i in range(len(self.mats)):
+            yield self[i]
+    def __getitem__(self, i):
+        if isinstance(i, (int, np.integer)):
+            (a, b), (c, d) = self.mats[i]
+            return Transform(complex(a), complex(b), complex(c), complex(d),
+                             conj=bool(self.conj[i]))
+        return TransformStack(self.mats[i], self.conj[i])
+    def __repr__(self):
+        return '{}({})'.format(type(self).__name__, len(self))
+    def to_list(self):
+        '''Convert to a list of Transform objects.'''
+        return list(self)
+    @staticmethod
+    def from_transforms(transforms):
+        transforms = list(transforms)
+        mats = np.array([t.abcd for t in transforms], dtype=np.complex128)
+        conj = np.fromiter((t.conj for t in transforms), dtype=bool,
+                           count=len(transforms))
+        return TransformStack(mats.reshape(-1, 2, 2), conj)
+    @staticmethod
+    def from_transform(trans, n=1):
+        '''Return a stack of n copies of trans.'''
+        mats = np.empty((n, 2, 2), dtype=np.complex128)
+        mats[:] = np.reshape(trans.abcd, (2, 2))
+        return TransformStack(mats, trans.conj)
+    @staticmethod
+    def identity(n=1):
+        mats = np.zeros((n, 2, 2), dtype=np.complex128)
+        mats[:, 0, 0] = mats[:, 1, 1] = 1
+        return TransformStack(mats)
+    @staticmethod
+    def _as_stack(trans):
+        if isinstance(trans, TransformStack):
+            return trans
+        if isinstance(trans, Transform):
+            return TransformStack.from_transform(trans)
+        return TransformStack.from_transforms(trans)
+    @staticmethod
+    def merge(*transforms, normalize=None):
+        '''Batched version of Transform.merge.
+
+        Each argument may be a TransformStack, a list of transforms, or a
+        single Transform.  Stacks of length one (including single Transforms)
+        are broadcast against the others.  Like Transform.merge, the result is
+        normalized if normalize (or Transform.auto_normalize) is True.  The
+        drift is reported to TransformStack.drift_hook, not
+        Transform.drift_hook.
+        '''
+        mats = np.eye(2, dtype=np.complex128)[np.newaxis]
+        conj = np.zeros(1, dtype=bool)
+        for trans in transforms:
+            trans = TransformStack._as_stack(trans)
+            mats = np.where(trans.conj[:, np.newaxis, np.newaxis],
+                            mats.conj(), mats)
+            mats = trans.mats @ mats
+            conj = conj ^ trans.conj
+        stack = TransformStack(mats, conj)
+        if TransformStack.drift_hook is not None:
+            TransformStack.drift_hook(stack, stack.drift())
+        if normalize is None:
+            normalize = Transform.auto_normalize
+        if normalize:
+            stack = stack.normalized()
+        return stack
+    def _unit_det_mats(self):
+        mats = self.mats
+        det = mats[:, 0, 0]*mats[:, 1, 1] - mats[:, 0, 1]*mats[:, 1, 0]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return mats / np.sqrt(det)[:, np.newaxis, np.newaxis], det == 0
+    def drift(self):
+        '''Return an array with the drift (see Transform.drift) of each
+        transform.
+        '''
+        mats, singular = self._unit_det_mats()
+        a, b, c, d = mats[:, 0, 0], mats[:, 0, 1], mats[:, 1, 0], mats[:, 1, 1]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            drift = ((np.abs(a - d.conj()) + np.abs(b - c.conj()))
+                     / (np.abs(a) + np.abs(b)))
+        drift[singular] = np.inf
+        return drift
+    def normalized(self):
+        '''Batched version of Transform.normalized.'''
+        mats, singular = self._unit_det_mats()
+        if np.any(singular):
+            raise ValueError('Transform is singular')
+        a, b, c, d = mats[:, 0, 0], mats[:, 0, 1], mats[:, 1, 0], mats[:, 1, 1]
+        iso = ((np.abs(a - d.conj()) + np.abs(b - c.conj()))
+               <= Transform.isometry_tolerance * (np.abs(a) + np.abs(b)))
+        alpha = (a[iso] + d[iso].conj()) / 2
+        beta = (b[iso] + c[iso].conj()) / 2
+        n = np.sqrt(np.abs(alpha)**2 - np.abs(beta)**2)
+        alpha /= n
+        beta /= n
+        mats[iso, 0, 0] = alpha
+        mats[iso, 0, 1] = beta
+        mats[iso, 1, 0] = beta.conj()
+        mats[iso, 1, 1] = alpha.conj()
+        a = mats[:, 0, 0]
+        flip = (a.real < 0) | ((a.real == 0) & (a.imag < 0))
+        mats[flip] *= -1
+        return TransformStack(mats, self.conj)
+    def inverted(self):
+        mats = np.where(self.conj[:, np.newaxis, np.newaxis],
+                        self.mats.conj(), self.mats)
+        inv = np.empty_like(mats)
+        inv[:, 0, 0] = -mats[:, 1, 1]
+        inv[:, 0, 1] = mats[:, 0, 1]
+        inv[:, 1, 0] = mats[:, 1, 0]
+        inv[:, 1, 1] = -mats[:, 0, 0]
+        return TransformStack(inv, self.conj)
+    def conjugate(self):
+        return TransformStack(self.mats.conj(), ~self.conj)
+    def apply_to_array(self, points, all_pairs=False, out=None):
+        '''Apply the transforms to a complex numpy array or PointArray.
+
+        By default transform i is applied to point i and the normal numpy
+        broadcasting rules apply, so a single point or a stack of one
+        transform also works.  With all_pairs=True the result is an (N, M)
+        complex array where entry (i, j) is transform i applied to point j.
+        '''
+        is_point_array = isinstance(points, PointArray)
+        z = points.z if is_point_array else np.asarray(
+                points, dtype=np.complex128)
+        a, b, c, d = (self.mats[:, 0, 0], self.mats[:, 0, 1],
+                      self.mats[:, 1, 0], self.mats[:, 1, 1])
+        conj = self.conj
+        if all_pairs:
+            a, b, c, d, conj = (v[:, np.newaxis] for v in (a, b, c, d, conj))
+            z = z[np.newaxis, :]
+        z = np.where(conj, np.conjugate(z), z)
+        numer = a*z + b
+        denom = c*z + d
+        # Match Transform.apply_to_tuple near the pole
+        denom[np.abs(denom) <= util.epsilon] = 1e-5
+        out = np.divide(numer, denom, out=out)
+        if is_point_array and out.ndim == 1:
+            return PointArray(out)
+        return out
+    def apply_to_gcircle(self, a, b, d, all_pairs=False):
+        '''Apply the transforms to generalized circles given as arrays of
+        coefficients (see Transform.apply_to_gcircle).
+
+        Broadcasting and all_pairs work like apply_to_array.
+        '''
+        a, b, d = (np.asarray(a, dtype=float),
+                   np.asarray(b, dtype=np.complex128),
+                   np.asarray(d, dtype=float))
+        p, q, r, s = (self.mats[:, 0, 0], self.mats[:, 0, 1],
+                      self.mats[:, 1, 0], self.mats[:, 1, 1])
+        conj = self.conj
+        if all_pairs:
+            p, q, r, s, conj = (v[:, np.newaxis] for v in (p, q, r, s, conj))
+            a, b, d = a[np.newaxis, :], b[np.newaxis, :], d[np.newaxis, :]
+        b = np.where(conj, np.conjugate(b), b)
+        return Transform._gcircle_image(p, q, r, s, a, b, d)
@@ -0,0 +1,201 @@
+import heapq
+import math
+
+import numpy as np
+
+from .distance import _prepare
+
+
+class VPTree:
+    '''A vantage-point tree for proximity queries in the Poincare disk.
+
+    The tree partitions points by their hyperbolic distance to a vantage point
+    so nearest neighbour and radius queries only visit a few branches.  Leaves
+    hold up to 2*leaf_size points and are searched with numpy.  Points may be
+    added with insert or extend without rebuilding the tree.  Indices returned
+    by queries refer to the order the points were added.
+    '''
+    def __init__(self, points=(), leaf_size=32, seed=0):
+        self.leaf_size = leaf_size
+        self._rng = np.random.default_rng(seed)
+        self._z = np.empty(0, dtype=np.complex128)
+        self._w = np.empty(0, dtype=np.float64)
+        self._size = 0
+        # Nodes are stored as parallel lists.  Leaves have a vantage point
+        # index of -1 and a bucket of point indices.
+        self._vp = []
+        self._mu = []
+        self._inside = []
+        self._outside = []
+        self._bucket = []
+        self._new_node()
+        if len(points) > 0:
+            self.extend(points)
+    def __len__(self):
+        return self._size
+    def _new_node(self):
+        self._vp.append(-1)
+        self._mu.append(0.0)
+        self._inside.append(-1)
+        self._outside.append(-1)
+        self._bucket.append(np.empty(0, dtype=np.intp))
+        return len(self._vp) - 1
+    def _reserve(self, n):
+        if n > len(self._z):
+            cap = max(n, 2*len(self._z))
+            z = np.empty(cap, dtype=np.complex128)
+            w = np.empty(cap, dtype=np.float64)
+            z[:self._size] = self._z[:self._size]
+            w[:self._size] = self._w[:self._size]
+            self._z, self._w = z, w
+    def _distances(self, z, w, idx):
+        # See distance._distance_block
+        s = np.abs(self._z[idx] - z) / np.sqrt(self._w[idx] * w)
+        return 2 * np.arcsinh(s)
+    def _distance(self, z, w, i):
+        return 2 * math.asinh(abs(self._z[i] - z) / math.sqrt(self._w[i] * w))
+    def _build(self, node, idx):
+        '''Fill node with a balanced subtree containing the points idx.'''
+        if len(idx) <= self.leaf_size:
+            self._vp[node] = -1
+            self._bucket[node] = idx
+            return
+        vp = idx[self._rng.integers(len(idx))]
+        rest = idx[idx != vp]
+        d = self._distances(self._z[vp], self._w[vp], rest)
+        half = len(rest) // 2
+        order = np.argpartition(d, half)
+        # Inside points are no farther than mu and outside points no closer
+        mu = (d[order[:half]].max() + d[order[half]]) / 2
+        inside, outside = self._new_node(), self._new_node()
+        self._vp[node] = vp
+        self._mu[node] = mu
+        self._inside[node] = inside
+        self._outside[node] = outside
+        self._bucket[node] = None
+        self._build(inside, rest[order[:half]])
+        self._build(outside, rest[order[half:]])
+    def _find_leaf(self, z, w):
+        node = 0
+        while self._vp[node] >= 0:
+            if self._distance(z, w, self._vp[node]) <= self._mu[node]:
+                node = self._inside[node]
+            else:
+                node = self._outside[node]
+        return node
+    def extend(self, points):
+        '''Add many points.
+
+        If the tree is empty, it is built balanced from all the points at
+        once.
+        '''
+        z, w = _prepare(points)
+        start = self._size
+        self._reserve(start + len(z))
+        self._z[start:start+len(z)] = z
+        self._w[start:start+len(z)] = w
+        self._size += len(z)
+        if start == 0:
+            self._build(0, np.arange(len(z)))
+        else:
+            for i in range(start, self._size):
+                self._insert_index(i)
+    def insert(self, point):
+        '''Add a single point and return its index.'''
+        self.extend([point])
+        return self._size - 1
+    def _insert_index(self, i):
+        node = self._find_leaf(self._z[i], self._w[i])
+        bucket = np.append(self._bucket[node], i)
+        if len(bucket) > 2*self.leaf_size:
+            self._build(node, bucket)
+        else:
+            self._bucket[node] = bucket
+    def _search(self, z, w, tau, visit):
+        '''Visit every leaf bucket and vantage point that could be within
+        tau() of the query.
+        '''
+        stack = [(0, 0.0)]
+        while stack:
+            node, lower_bound = stack.pop()
+            if lower_bound > tau():
+                continue
+            vp = self._vp[node]
+            if vp < 0:
+                idx = self._bucket[node]
+                if len(idx) > 0:
+                    visit(idx, self._distances(z, w, idx))
+                continue
+            d = self._distance(z, w, vp)
+            visit(vp, d)
+            mu = self._mu[node]
+            # Push the nearer side last so it is searched first
+            if d <= mu:
+                stack.append((self._outside[node], max(lower_bound, mu - d)))
+                stack.append((self._inside[node], lower_bound))
+            else:
+                stack.append((self._inside[node], max(lower_bound, d - mu)))
+                stack.append((self._outside[node], lower_bound))
+    def _query_one(self, z, w, k):
+        heap = []  # Max heap of the best k as (-distance, index)
+        def tau():
+            return -heap[0][0] if len(heap) >= k else math.inf
+        def visit(idx, d):
+            if isinstance(idx, np.ndarray):
+                limit = tau()
+                for i, di in zip(idx[d < limit], d[d < limit]):
+                    self._push(heap, k, float(di), int(i))
+            else:
+                self._push(heap, k, d, int(idx))
+        self._search(z, w, tau, visit)
+        heap.sort(reverse=True)
+        return [i for _, i in heap], [-nd for nd, _ in heap]
+    @staticmethod
+    def _push(heap, k, d, i):
+        if len(heap) < k:
+            heapq.heappush(heap, (-d, i))
+        elif d < -heap[0][0]:
+            heapq.heapreplace(heap, (-d, i))
+    def query(self, queries, k=1):
+        '''Return the k nearest points to each query point.
+
+        Returns (indices, distances), each with shape (N, k) and sorted by
+        distance.
+        '''
+        if not 0 < k <= self._size:
+            raise ValueError('k must be between 1 and the number of points')
+        zq, wq = _prepare(queries)
+        indices = np.empty((len(zq), k), dtype=np.intp)
+        distances = np.empty((len(zq), k), dtype=np.float64)
+        for j in range(len(zq)):
+            indices[j], distances[j] = self._query_one(
+                    complex(zq[j]), float(wq[j]), k)
+        return indices, distances
+    def query_radius(self, queries, r, return_distance=False):
+        '''Return the points within hyperbolic distance r of each query point.
+
+        Returns a list with an array of indices for each query, sorted by
+        distance, and also a list of distance arrays if return_distance is
+        True.
+        '''
+        zq, wq = _prepare(queries)
+        all_indices, all_distances = [], []
+        for j in range(len(zq)):
+            found_idx, found_d = [], []
+            def visit(idx, d):
+                if isinstance(idx, np.ndarray):
+                    found_idx.append(idx[d <= r])
+                    found_d.append(d[d <= r])
+                elif d <= r:
+                    found_idx.append(np.array([idx], dtype=np.intp))
+                    found_d.append(np.array([d]))
+            self._search(complex(zq[j]), float(wq[j]), lambda: r, visit)
+            idx = np.concatenate(found_idx) if found_idx else np.empty(
+                    0, dtype=np.intp)
+            d = np.concatenate(found_d) if found_d else np.empty(0)
+            order = np.argsort(d, kind='stable')
+            all_indices.append(idx[order])
+            all_distances.append(d[order])
+        if return_distance:
+            return all_indices, all_distances
+        return all_indices
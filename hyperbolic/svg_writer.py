@@ -0,0 +1,486 @@
+import contextlib
+import math
+import os
+import re
+from xml.sax.saxutils import escape
+
+import numpy as np
+
+
+XML_HEADER = '<?xml version="1.0" encoding="UTF-8"?>\n'
+SVG_START = ('<svg xmlns="http://www.w3.org/2000/svg" '
+             'xmlns:xlink="http://www.w3.org/1999/xlink"\n     ')
+
+
+def _attr_name(name):
+    '''Convert a keyword argument to an SVG attribute name like drawsvg.'''
+    name = name.replace('__', ':').replace('_', '-')
+    if name[-1] == '-':
+        name = name[:-1]
+    return name
+
+def _format_attrs(attrs, convert_names=True):
+    return ''.join(
+            ' {}="{}"'.format(_attr_name(k) if convert_names else k,
+                              escape(str(v), {'"': '&quot;'}))
+            for k, v in attrs.items()
+            if v is not None)
+
+
+class PathWriter:
+    '''Writes the commands of a path's d attribute to a file as they are
+    drawn.
+
+    Implements the drawsvg.Path commands used by the draw_to_path methods of
+    shapes so they can be drawn without a drawsvg.Path.
+
+    By default the commands are written like drawsvg writes them.  With
+    precision, coordinates are rounded to that many decimal places and
+    numbers are written without redundant zeros and separators.  With
+    relative, commands are written relative to the current point and
+    repeated command letters and lines that only change x or y are
+    shortened.  Relative coordinates are differences of rounded absolute
+    coordinates so rounding errors don't add up along a path.
+    '''
+    def __init__(self, file, precision=None, relative=False):
+        self.file = file
+        self.empty = True
+        self.precision = precision
+        self.relative = relative
+        self._compact = precision is not None or relative
+        # The current point and subpath start as a renderer computes them
+        self._x = self._y = 0.0
+        self._start = (0.0, 0.0)
+        self._last_cmd = None
+        self._last_num = None
+    def append(self, command_str, *args):
+        if self._compact:
+            self._append_compact(command_str, args)
+            return self
+        if not self.empty:
+            command_str = ' ' + command_str
+        if args:
+            command_str = command_str + ','.join(map(str, args))
+        self.file.write(command_str)
+        self.empty = False
+        return self
+    def append_data(self, d):
+        '''Append path data d, such as the d attribute of another path.'''
+        if not self._compact:
+            if d:
+                self.file.write(d if self.empty else ' ' + d)
+                self.empty = False
+            return self
+        for cmd, arg_str in _path_command_re.findall(d):
+            args = _path_number_re.findall(arg_str)
+            n = _path_arg_counts[cmd.upper()]
+            if n == 0:
+                self.append(cmd)
+                continue
+            for i in range(0, len(args), n):
+                self.append(cmd, *map(float, args[i:i+n]))
+                # Coordinates after a move are lines
+                if cmd in 'Mm':
+                    cmd = 'L' if cmd == 'M' else 'l'
+        return self
+    def M(self, x, y):
+        return self.append('M', x, y)
+    def L(self, x, y):
+        return self.append('L', x, y)
+    def A(self, rx, ry, rot, large_arc, sweep, ex, ey):
+        return self.append('A', rx, ry, rot, int(bool(large_arc)),
+                           int(bool(sweep)), ex, ey)
+    def Z(self):
+        return self.append('Z')
+    def arc(self, cx, cy, r, start_deg, end_deg, cw=True, include_m=True,
+            include_l=False):
+        '''Draw a circular arc like drawsvg.Path.arc.'''
+        large_arc = ((end_deg - start_deg) % 360 <= 180) ^ cw
+        start_rad, end_rad = start_deg*math.pi/180, end_deg*math.pi/180
+        sx, sy = r*math.cos(start_rad), r*math.sin(start_rad)
+        ex, ey = r*math.cos(end_rad), r*math.sin(end_rad)
+        if include_l:
+            self.L(cx+sx, cy+sy)
+        elif include_m:
+            self.M(cx+sx, cy+sy)
+        return self.A(r, r, 0, large_arc, cw, cx+ex, cy+ey)
+    def _round(self, v):
+        return v if self.precision is None else round(v, self.precision)
+    def _format(self, v):
+        if self.precision is None:
+            s = repr(float(v))
+            if s.endswith('.0'):
+                s = s[:-2]
+        else:
+            s = f'{v:.{self.precision}f}'
+            if '.' in s:
+                s = s.rstrip('0').rstrip('.')
+        if s.startswith('0.'):
+            s = s[1:]
+        elif s.startswith('-0.'):
+            s = '-' + s[2:]
+        elif s == '-0':
+            s = '0'
+        return s
+    def _append_compact(self, cmd, args):
+        upper = cmd.upper()
+        x, y = self._x, self._y
+        args = [float(a) for a in args]
+        if cmd != upper:
+            # Make relative input absolute
+            if upper == 'H':
+                args[0] += x
+            elif upper == 'V':
+                args[0] += y
+            elif upper == 'A':
+                args[5] += x
+                args[6] += y
+            else:
+                for i in range(0, len(args), 2):
+                    args[i] += x
+                    args[i+1] += y
+        if upper == 'H':
+            upper, args = 'L', [args[0], y]
+        elif upper == 'V':
+            upper, args = 'L', [x, args[0]]
+        if upper == 'Z':
+            self._write_command('z' if self.relative else 'Z', ())
+            self._x, self._y = self._start
+            self._last_cmd = None
+            return
+        # The absolute coordinates as they will be rendered
+        if upper == 'A':
+            coords = [self._round(args[5]), self._round(args[6])]
+        else:
+            coords = [self._round(a) for a in args]
+        end_x, end_y = coords[-2], coords[-1]
+        if self.relative:
+            coords = [c - (y if i % 2 else x) for i, c in enumerate(coords)]
+            end_x, end_y = x + coords[-2], y + coords[-1]
+        nums = [self._format(c) for c in coords]
+        if upper == 'A':
+            nums = ([self._format(args[0]), self._format(args[1]),
+                     self._format(args[2]), str(int(args[3])),
+                     str(int(args[4]))] + nums)
+        if upper == 'L':
+            if nums[0] == (self._format(0) if self.relative
+                           else self._format(x)):
+                upper, nums = 'V', nums[1:]
+            elif nums[1] == (self._format(0) if self.relative
+                             else self._format(y)):
+                upper, nums = 'H', nums[:1]
+        self._write_command(upper.lower() if self.relative else upper, nums)
+        if upper == 'M':
+            self._start = (end_x, end_y)
+        self._x, self._y = end_x, end_y
+    def _write_command(self, cmd, nums):
+        parts = []
+        if cmd != self._last_cmd:
+            parts.append(cmd)
+            last_num = None
+        else:
+            last_num = self._last_num
+        for num in nums:
+            if last_num is not None and not (
+                    num[0] == '-' or (num[0] == '.'
+                                      and ('.' in last_num
+                                           or 'e' in last_num))):
+                parts.append(' ')
+            parts.append(num)
+            last_num = num
+        self.file.write(''.join(parts))
+        self.empty = False
+        # Coordinates after a move are lines
+        self._last_cmd = {'M': 'L', 'm': 'l'}.get(cmd, cmd)
+        self._last_num = last_num
+
+_path_arg_counts = {'M': 2, 'L': 2, 'H': 1, 'V': 1, 'C': 6, 'S': 4, 'Q': 4,
+                    'T': 2, 'A': 7, 'Z': 0}
+_path_command_re = re.compile(
+        '([MmLlHhVvCcSsQqTtAaZz])([^MmLlHhVvCcSsQqTtAaZz]*)')
+_path_number_re = re.compile(r'[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?')
+
+def _is_plain_path(element):
+    '''Return whether element is a drawsvg.Path that only has path data and
+    text attributes.'''
+    import drawsvg
+    return (type(element) is drawsvg.Path and not element.children
+            and not element.ordered_children
+            and all(isinstance(v, (str, int, float))
+                    for v in element.args.values()))
+
+
+# Attributes that share_styles moves into CSS classes
+_STYLE_ATTRS = frozenset((
+    'fill', 'fill-opacity', 'fill-rule', 'stroke', 'stroke-width',
+    'stroke-opacity', 'stroke-linecap', 'stroke-linejoin', 'stroke-dasharray',
+    'stroke-dashoffset', 'stroke-miterlimit', 'opacity', 'color', 'display',
+    'visibility', 'font-family', 'font-weight', 'font-style', 'text-anchor',
+    'dominant-baseline', 'paint-order', 'vector-effect', 'clip-rule'))
+
+
+class SvgWriter:
+    '''Writes an SVG document one element at a time.
+
+    Unlike drawsvg.Drawing, elements are written to file as they are drawn
+    and not kept so a drawing of millions of tiles is written in constant
+    memory.  Tiles and shapes are written as path data without creating
+    drawsvg elements.  file is a path or a text file object and width,
+    height, origin, and svg_args are as for drawsvg.Drawing.  Use as a
+    context manager or call close to finish the document.
+
+    The other options make the document smaller:
+
+        with SvgWriter('tiling.svg', 2, 2, origin='center', precision=4,
+                       relative=True, share_styles=True,
+                       merge_paths=True) as writer:
+            writer.draw_tiles(tiles, fill='red', stroke='black',
+                              stroke_width=0.002)
+
+    precision and relative are as for PathWriter.  With share_styles, each
+    distinct set of style attributes (fill, stroke, etc.) of a path is
+    written once as a CSS class.  With merge_paths, consecutive paths with
+    the same attributes are written as the subpaths of one path element of
+    up to max_merged_paths subpaths.  Merged shapes are filled and blended
+    together so overlapping shapes no longer show through each other and,
+    with the default nonzero fill rule, overlapping shapes drawn in opposite
+    directions leave a hole.  Elements other than paths are written
+    unchanged.
+    '''
+    max_merged_paths = 1000
+    def __init__(self, file, width, height, origin=(0,0), precision=None,
+                 relative=False, share_styles=False, merge_paths=False,
+                 **svg_args):
+        if isinstance(origin, str):
+            view_box = {
+                'center': (-width/2, -height/2, width, height),
+                'top-left': (0, 0, width, height),
+                'top-right': (-width, 0, width, height),
+                'bottom-left': (0, -height, width, height),
+                'bottom-right': (-width, -height, width, height),
+            }[origin]
+        else:
+            origin = tuple(origin)
+            if len(origin) != 2:
+                raise ValueError("Expected origin 'center', 'top-left', ..., "
+                                 f"'bottom-right' or (x, y). Got {origin}.")
+            view_box = origin + (width, height)
+        self.precision = precision
+        self.relative = relative
+        self.share_styles = share_styles
+        self.merge_paths = merge_paths
+        self._compact = (precision is not None or relative or share_styles
+                         or merge_paths)
+        # Style attributes to CSS class name
+        self._classes = {}
+        # The attributes, PathWriter, and number of subpaths of the path
+        # element being merged into
+        self._open_path = None
+        self._owns_file = isinstance(file, (str, os.PathLike))
+        self.file = open(file, 'w') if self._owns_file else file
+        self.file.write(XML_HEADER)
+        self.file.write(SVG_START)
+        self.file.write(_format_attrs(
+                dict(width=width, height=height,
+                     viewBox=' '.join(map(str, view_box))),
+                convert_names=False).lstrip())
+        self.file.write(_format_attrs(svg_args))
+        self.file.write('>\n')
+    def __enter__(self):
+        return self
+    def __exit__(self, *exc):
+        self.close()
+    def close(self):
+        '''Finish the document and close file if it was given as a path.'''
+        if self.file is None:
+            return
+        self._close_open_path()
+        if self._classes:
+            self.file.write('<style>')
+            self.file.writelines(
+                    escape('.{}{{{}}}'.format(
+                            name, ';'.join(f'{k}:{v}' for k, v in style)))
+                    for style, name in self._classes.items())
+            self.file.write('</style>\n')
+        self.file.write('</svg>\n')
+        if self._owns_file:
+            self.file.close()
+        else:
+            self.file.flush()
+        self.file = None
+    def flush(self):
+        self._close_open_path()
+        self.file.flush()
+    def _path_attrs(self, kwargs):
+        '''Return the formatted attributes of a path with attributes kwargs
+        (excluding d).'''
+        if not self.share_styles:
+            return _format_attrs(kwargs)
+        attrs, style = {}, []
+        for k, v in kwargs.items():
+            if v is None:
+                continue
+            name = _attr_name(k)
+            if name in _STYLE_ATTRS:
+                style.append((name, str(v)))
+            else:
+                attrs[name] = v
+        if style:
+            style = tuple(sorted(style))
+            name = self._classes.get(style)
+            if name is None:
+                name = self._classes[style] = f's{len(self._classes)}'
+            if attrs.get('class'):
+                name = f"{attrs['class']} {name}"
+            attrs['class'] = name
+        return _format_attrs(attrs, convert_names=False)
+    def _start_path(self, attrs):
+        '''Return a PathWriter for the data of a path with formatted
+        attributes attrs.'''
+        if self._open_path is not None:
+            open_attrs, path, count = self._open_path
+            if open_attrs == attrs and count < self.max_merged_paths:
+                self._open_path = (attrs, path, count + 1)
+                return path
+            self._close_open_path()
+        self.file.write('<path d="')
+        path = PathWriter(self.file, self.precision, self.relative)
+        self._open_path = (attrs, path, 1)
+        return path
+    def _end_path(self):
+        if not self.merge_paths:
+            self._close_open_path()
+    def _close_open_path(self):
+        if self._open_path is not None:
+            self.file.write(f'"{self._open_path[0]} />\n')
+            self._open_path = None
+    @contextlib.contextmanager
+    def path(self, **kwargs):
+        '''Return a context manager that writes a path element with attributes
+        kwargs and gives a PathWriter for its path data.
+
+            with writer.path(fill='red') as path:
+                shape.draw_to_path(path)
+        '''
+        path = self._start_path(self._path_attrs(kwargs))
+        try:
+            yield path
+        finally:
+            self._end_path()
+    def write_path(self, d, **kwargs):
+        '''Write a path element with path data d.'''
+        if not self._compact:
+            self.file.write(f'<path d="{d}"{_format_attrs(kwargs)} />\n')
+            return
+        self._start_path(self._path_attrs(kwargs)).append_data(d)
+        self._end_path()
+    def write_element(self, element):
+        '''Write a drawsvg element.
+
+        The element is written on its own so it must not need definitions
+        such as gradients, markers, or clip paths.  Plain paths are written
+        with write_path when any of the compact options is used.
+        '''
+        if self._compact and _is_plain_path(element):
+            args = dict(element.args)
+            self.write_path(args.pop('d'), **args)
+            return
+        self._close_open_path()
+        from drawsvg.types import Context, LocalContext
+        element.write_svg_element(
+                {}, lambda elem: False, self.file,
+                LocalContext(Context(), element, None), False)
+        self.file.write('\n')
+    def draw(self, obj, **kwargs):
+        '''Write obj like drawsvg.Drawing.draw.
+
+        Tiles are written with draw_tiles, drawsvg elements as is, and any
+        other object as the elements of obj.to_drawables(**kwargs).
+        '''
+        from .tiles import Tile
+        if isinstance(obj, Tile):
+            self.draw_tiles([obj], **kwargs)
+            return
+        if hasattr(obj, 'write_svg_element'):
+            self.write_element(obj)
+            return
+        for element in obj.to_drawables(**kwargs):
+            self.write_element(element)
+    def draw_shapes(self, *shapes, close=False, transform=None, **kwargs):
+        '''Write one path through shapes (objects with draw_to_path such as
+        Line, Hypercycle, Polygon, and the euclid shapes) in order.
+
+        Each shape continues from the end of the previous one.  Use close to
+        end the path with Z.  transform is applied to hyperbolic shapes.
+        '''
+        with self.path(**kwargs) as path:
+            for i, shape in enumerate(shapes):
+                draw_kwargs = dict(include_m=i == 0)
+                if transform is not None:
+                    draw_kwargs['transform'] = transform
+                shape.draw_to_path(path, **draw_kwargs)
+            if close:
+                path.Z()
+    def draw_tiles(self, tiles, decorator=None, batch_size=256, **kwargs):
+        '''Write tiles (any iterable of Tile including a TileSet or
+        TileLayout.iter_tiles) as drawsvg.Drawing.draw(tile, **kwargs) would
+        for each tile.
+
+        Tiles are drawn by decorator if given or by their own decorator.
+        They are drawn in batches of up to batch_size consecutive tiles with
+        the same decorator using TileDecorator.tiles_to_path_data so only one
+        batch is held in memory.  Decorators that draw other elements than
+        paths are written with their drawables.
+        '''
+        from .tiles import TileDecorator, TileSet
+        outlines = TileDecorator()
+        hwidth = kwargs.get('hwidth')
+        transform = kwargs.get('transform')
+        attrs = self._path_attrs({k: v for k, v in kwargs.items()
+                                  if k not in ('hwidth', 'transform')})
+        def write_batch(dec, batch):
+            get_path_data = getattr(dec, 'tiles_to_path_data', None)
+            data = (None if get_path_data is None
+                    else get_path_data(batch, hwidth=hwidth,
+                                       transform=transform))
+            if data is not None and not self._compact:
+                self.file.writelines(f'<path d="{d}"{attrs} />\n'
+                                     for d in data)
+            elif data is not None:
+                for d in data:
+                    self._start_path(attrs).append_data(d)
+                    self._end_path()
+            elif hasattr(dec, 'tiles_to_drawables'):
+                for element in dec.tiles_to_drawables(batch, **kwargs):
+                    self.write_element(element)
+            else:
+                for tile in batch:
+                    for element in dec.to_drawables(tile=tile, **kwargs):
+                        self.write_element(element)
+        def tile_decorator(dec):
+            if decorator is not None:
+                return decorator
+            return outlines if dec is None else dec
+        if isinstance(tiles, TileSet):
+            # Write runs of rows with the same decorator without creating
+            # tiles
+            dec_index = tiles.decorator_index
+            starts = np.flatnonzero(np.diff(dec_index)) + 1
+            bounds = [0, *starts.tolist(), len(tiles)]
+            for start, stop in zip(bounds[:-1], bounds[1:]):
+                i = int(dec_index[start])
+                dec = tile_decorator(None if i < 0 else tiles.decorators[i])
+                for batch_start in range(start, stop, batch_size):
+                    write_batch(dec, tiles[batch_start:min(
+                            stop, batch_start+batch_size)])
+            return
+        batch, batch_dec = [], None
+        for tile in tiles:
+            dec = tile_decorator(tile.decorator)
+            if batch and (dec is not batch_dec or len(batch) >= batch_size):
+                write_batch(batch_dec, batch)
+                batch = []
+            batch_dec = dec
+            batch.append(tile)
+        if batch:
+            write_batch(batch_dec, batch)
@@ -1,7 +1,13 @@
 from .edge import Edge
+from .edge_map import EdgeMap
 from .tile import Tile
+from .tile_set import TileSet
+from .tile_adjacency import TileAdjacency
+from .tile_locator import TileLocator
 from .tile_gen import TileGen
-from .tile_layout import TileLayout
+from .tile_layout import TileLayout, tile_bounding_circle, tile_size
+from .tile_cache import TileCache
+from .tiling import Tiling
 from .decorator import (
     TileDecorator,
     TileDecoratorNull,
@@ -1,17 +1,131 @@
-from ..poincare import Transform, Point, Polygon
+from collections import OrderedDict
+
+import numpy as np
+
+from .. import util
+from ..euclid import Arc as EArc, Line as ELine
+from ..poincare import Transform, TransformStack, Point, Polygon
 from ..poincare.util import radial_poincare_to_euclid
+from .tile_set import TileSet
 
 
 class TileDecorator:
+    '''Draws the outline of a tile.
+
+    Outlines, and their offsets for the hwidth argument of
+    Polygon.to_drawables, are computed in the frame of the center tile (see
+    Tile.trans) and cached so congruent tiles, such as the tiles of one
+    TileGen, share them.  A single tile without an offset or hwidth is
+    drawn directly.
+    '''
+    # The number of cached outlines to keep
+    max_outlines = 256
+    # The cached outlines from least to most recently used, created on first
+    # use so subclasses don't need to call __init__
+    _outline_cache = None
     def to_drawables(self, tile=None, **kwargs):
         if tile is None: return ()
-        poly = tile.to_polygon()
-        ds = poly.to_drawables(**kwargs)
-        return ds
+        return self._outline_drawables([tile], 0, **kwargs)
+    def tiles_to_drawables(self, tiles, **kwargs):
+        '''Return a list of the drawables of this decorator on each of tiles
+        (a list of Tile or a TileSet) in order.
+
+        The result is the same as concatenating to_drawables(tile, **kwargs)
+        for each tile, whatever the tile's own decorator is.
+        '''
+        if type(self).to_drawables is TileDecorator.to_drawables:
+            return self._outline_drawables(tiles, 0, **kwargs)
+        return [d for tile in tiles for d in self.to_drawables(tile, **kwargs)]
+    def tiles_to_path_data(self, tiles, hwidth=None, transform=None):
+        '''Return a list of the d attribute of each path drawn by
+        tiles_to_drawables or None if this decorator draws other elements.
+
+        This lets tiles be written without creating drawsvg elements (see
+        SvgWriter).
+        '''
+        if type(self).to_drawables is not TileDecorator.to_drawables:
+            return None
+        return self._outline_path_data(tiles, 0, hwidth, transform)
+    def _outline_drawables(self, tiles, offset, hwidth=None, transform=None,
+                           **kwargs):
+        import drawsvg as draw
+        if not isinstance(tiles, TileSet):
+            tiles = list(tiles)
+        if not _shares_outlines(tiles, offset, hwidth):
+            return [d for tile in tiles
+                      for d in tile.to_polygon().to_drawables(
+                              transform=transform, **kwargs)]
+        return [draw.Path(d, **kwargs) for d in self._outline_path_data(
+                    tiles, offset, hwidth, transform)]
+    def _outline_path_data(self, tiles, offset, hwidth=None, transform=None):
+        '''Return the path data of the outline of each tile offset by offset.
+        '''
+        if not isinstance(tiles, TileSet):
+            tiles = list(tiles)
+        if not _shares_outlines(tiles, offset, hwidth):
+            return [d.args['d'] for tile in tiles
+                    for d in tile.to_polygon().to_drawables(
+                            transform=transform)]
+        if isinstance(tiles, TileSet):
+            trans = tiles.transforms
+            z = tiles.vertices[..., 0] + 1j*tiles.vertices[..., 1]
+            n_sides = tiles.n_sides.tolist()
+        else:
+            trans = TransformStack.from_transforms(
+                    tile.trans for tile in tiles)
+            n_sides = [len(tile.vertices) for tile in tiles]
+            z = np.full((len(tiles), max(n_sides, default=0)), np.nan,
+                        dtype=np.complex128)
+            for i, tile in enumerate(tiles):
+                z[i, :n_sides[i]] = [complex(*v) for v in tile.vertices]
+        # Congruent tiles have the same vertices in the center tile's frame
+        z = np.round(trans.inverted().apply_to_array(z.T).T, 9)
+        hwidths = _split_hwidth(hwidth)
+        groups = {}
+        for i, (conj, verts) in enumerate(zip(trans.conj.tolist(),
+                                              z.tolist())):
+            key = (conj, tuple(verts[:n_sides[i]]))
+            groups.setdefault(key, []).append(i)
+        outlines = self._outline_cache
+        if outlines is None:
+            outlines = self._outline_cache = OrderedDict()
+        out = [None] * len(trans)
+        for (conj, verts), rows in groups.items():
+            # Offsets are to the left of the edges, which is to the right of
+            # the edges in the center tile's frame for reflected tiles
+            sign = -1 if conj else 1
+            key = (conj, verts, sign*offset,
+                   hwidths and (sign*hwidths[0], sign*hwidths[1]))
+            if key in outlines:
+                outlines.move_to_end(key)
+            else:
+                if len(outlines) >= self.max_outlines:
+                    outlines.popitem(last=False)
+                tile = tiles[rows[0]]
+                poly = Polygon.from_vertices(
+                        tile.trans.inverted().apply_to_list(tile.vertices))
+                if offset:
+                    poly = poly.offset_polygon(sign*offset)
+                outlines[key] = _compile_polygons([poly], key[-1])
+            stack = trans[np.array(rows)]
+            if transform is not None:
+                stack = TransformStack.merge(stack, transform)
+            paths = _place_polygons(stack, outlines[key])
+            for row, (d,) in zip(rows, paths):
+                if d is None:
+                    poly = tiles[row].to_polygon()
+                    if offset:
+                        poly = poly.offset_polygon(offset)
+                    d, = poly.to_drawables(hwidth=hwidth, transform=transform)
+                    d = d.args['d']
+                out[row] = d
+        return out
 
 class TileDecoratorNull(TileDecorator):
     def to_drawables(self, tile=None, **kwargs):
         return ()
+    def tiles_to_path_data(self, tiles, hwidth=None, transform=None):
+        return []
 
 class TileDecoratorOffset(TileDecorator):
     def __init__(self, offset):
@@ -19,29 +133,238 @@ class TileDecoratorOffset(TileDecorator):
         self.offset = offset
     def to_drawables(self, tile=None, **kwargs):
         if tile is None: return ()
-        poly = tile.to_polygon()
-        poly = poly.offset_polygon(self.offset)
-        ds = poly.to_drawables(**kwargs)
-        return ds
+        return self._outline_drawables([tile], self.offset, **kwargs)
+    def tiles_to_drawables(self, tiles, **kwargs):
+        if type(self).to_drawables is not TileDecoratorOffset.to_drawables:
+            return super().tiles_to_drawables(tiles, **kwargs)
+        return self._outline_drawables(tiles, self.offset, **kwargs)
+    def tiles_to_path_data(self, tiles, hwidth=None, transform=None):
+        if type(self).to_drawables is not TileDecoratorOffset.to_drawables:
+            return None
+        return self._outline_path_data(tiles, self.offset, hwidth, transform)
 
 class TileDecoratorPolygons(TileDecorator):
+    '''Draws polygons given in the frame of the center tile on each tile.
+
+    Each polygon is compiled once per hwidth into the generalized circles
+    (see Transform.apply_to_gcircle) and endpoints of the edges it draws.
+    Placing the polygons on tiles transforms these arrays and writes the path
+    data directly, so tiles_to_drawables decorates many tiles with a few
+    numpy calls.
+    '''
     def __init__(self, *polys, poly_descs=[]):
         self.poly_descs = [p.make_restore_points() for p in polys]
         self.poly_descs.extend(poly_descs)
+        self._templates = {}
+        self._template_descs = ()
     def to_drawables(self, tile=None, **kwargs):
         if tile is None:
             trans = Transform.identity()
         else:
             trans = tile.trans
-        ds = []
-        for poly_desc in self.poly_descs:
-            d = self.desc_to_drawables(poly_desc, trans, **kwargs)
-            ds.extend(d)
-        return ds
+        if (type(self).desc_to_drawables
+                is not TileDecoratorPolygons.desc_to_drawables):
+            ds = []
+            for poly_desc in self.poly_descs:
+                d = self.desc_to_drawables(poly_desc, trans, **kwargs)
+                ds.extend(d)
+            return ds
+        return self._stack_to_drawables(
+                TransformStack.from_transform(trans), **kwargs)[0]
+    def tiles_to_drawables(self, tiles, **kwargs):
+        if not self._is_compiled():
+            return super().tiles_to_drawables(tiles, **kwargs)
+        return [d for ds in self._stack_to_drawables(
+                    _tile_transforms(tiles), **kwargs)
+                  for d in ds]
+    def tiles_to_path_data(self, tiles, hwidth=None, transform=None):
+        if not self._is_compiled():
+            return None
+        return [d for ds in self._stack_to_path_data(
+                    _tile_transforms(tiles), hwidth, transform)
+                  for d in ds]
     def desc_to_drawables(self, poly_desc, trans, **kwargs):
         poly_desc = trans.apply_to_list(poly_desc)
         poly = Polygon.from_restore_points(poly_desc)
         return poly.to_drawables(**kwargs)
+    def _is_compiled(self):
+        '''Return True unless a subclass changes how polygons are drawn.'''
+        cls = type(self)
+        return (cls.to_drawables is TileDecoratorPolygons.to_drawables
+                and cls.desc_to_drawables
+                    is TileDecoratorPolygons.desc_to_drawables)
+    def _template(self, hwidths):
+        '''Return the compiled polygons for hwidths, a pair of offsets or
+        None.
+        '''
+        # Compare the points, not the lists, so changes to poly_descs in
+        # place are seen
+        descs = tuple(tuple(complex(*p) for p in poly_desc)
+                      for poly_desc in self.poly_descs)
+        if descs != self._template_descs:
+            self._templates = {}
+            self._template_descs = descs
+        if hwidths not in self._templates:
+            self._templates[hwidths] = _compile_polygons(
+                    [Polygon.from_restore_points(poly_desc)
+                     for poly_desc in self.poly_descs], hwidths)
+        return self._templates[hwidths]
+    def _stack_to_drawables(self, trans, hwidth=None, transform=None,
+                            **kwargs):
+        '''Return a list of the drawables for each transform of trans.'''
+        import drawsvg as draw
+        return [[draw.Path(d, **kwargs) for d in ds]
+                for ds in self._stack_to_path_data(trans, hwidth, transform)]
+    def _stack_to_path_data(self, trans, hwidth=None, transform=None):
+        '''Return a list of the path data for each transform of trans.'''
+        hwidths = _split_hwidth(hwidth)
+        if hwidths is None:
+            groups = [(np.arange(len(trans)), None)]
+        else:
+            # Offsets are to the left of the edges, which is to the right of
+            # the edges in the center tile's frame for reflected tiles
+            groups = [(np.flatnonzero(~trans.conj), hwidths),
+                      (np.flatnonzero(trans.conj),
+                       (-hwidths[0], -hwidths[1]))]
+        out = [None] * len(trans)
+        for rows, group_hwidths in groups:
+            if not len(rows):
+                continue
+            stack = trans[rows]
+            if transform is not None:
+                stack = TransformStack.merge(stack, transform)
+            paths = _place_polygons(stack, self._template(group_hwidths))
+            for row, ds in zip(rows.tolist(), paths):
+                out[row] = []
+                for poly_desc, d in zip(self.poly_descs, ds):
+                    if d is None:
+                        out[row].extend(p.args['d'] for p in
+                                        self.desc_to_drawables(
+                                            poly_desc, trans[row],
+                                            hwidth=hwidth,
+                                            transform=transform))
+                    else:
+                        out[row].append(d)
+        return out
+
+def _shares_outlines(tiles, offset, hwidth):
+    '''Return True if the outlines of tiles should be placed from cached
+    outlines instead of drawn one at a time.
+
+    Placing pays for more than one tile or for offsets, which are slow to
+    compute, but not for a single plain outline.
+    '''
+    return len(tiles) > 1 or bool(offset) or hwidth is not None
+
+def _tile_transforms(tiles):
+    if isinstance(tiles, TileSet):
+        return tiles.transforms
+    return TransformStack.from_transforms(tile.trans for tile in tiles)
+
+def _split_hwidth(hwidth):
+    '''Return the offsets drawn by Polygon.to_drawables for hwidth.'''
+    if hwidth is None:
+        return None
+    try:
+        hwidth1, hwidth2 = hwidth
+    except TypeError:
+        hwidth = float(hwidth)
+        hwidth1, hwidth2 = -hwidth/2, hwidth/2
+    return hwidth1, hwidth2
+
+def _compile_polygons(polys, hwidths):
+    '''Compile polys, offset by hwidths unless it is None, in the way
+    Polygon.to_drawables draws them.
+
+    Returns ((a, b, d, start, end), polys) where the edge arrays hold the
+    generalized circle and complex endpoints of each drawn edge and polys
+    has a list of (edge index, start command) for each polygon or None if
+    the polygon has an edge that can't be compiled.
+    '''
+    gcircles, starts, ends, compiled = [], [], [], []
+    for poly in polys:
+        if hwidths is None:
+            parts = [(poly, 'M')]
+        else:
+            parts = [(poly.offset_polygon(hwidths[0], reverse_order=False),
+                      'M'),
+                     (poly.offset_polygon(hwidths[1], reverse_order=True),
+                      'L')]
+        shapes = []
+        for part, cmd in parts:
+            for i, edge in enumerate(part.edges):
+                if isinstance(edge, Point):
+                    continue
+                shapes.append((getattr(edge, 'proj_shape', None),
+                               cmd if i == 0 else ''))
+        if not all(isinstance(shape, (EArc, ELine)) for shape, _ in shapes):
+            compiled.append(None)
+            continue
+        ops = []
+        for shape, cmd in shapes:
+            ops.append((len(gcircles), cmd))
+            gcircles.append(Transform.shape_gcircle(shape))
+            starts.append(complex(*shape.start_point()))
+            ends.append(complex(*shape.end_point()))
+        compiled.append(ops)
+    coefs = np.array(gcircles, dtype=np.complex128).reshape(-1, 3)
+    edges = (coefs[:, 0].real, coefs[:, 1], coefs[:, 2].real,
+             np.array(starts, dtype=np.complex128),
+             np.array(ends, dtype=np.complex128))
+    return edges, compiled
+
+def _place_polygons(stack, compiled):
+    '''Return a list with the path data (or None if it wasn't compiled) of
+    each compiled polygon placed by each transform of stack.
+    '''
+    edges, polys = compiled
+    paths = _edge_path_data(stack, *edges)
+    out = []
+    for edge_paths in paths:
+        ds = []
+        for ops in polys:
+            if ops is None:
+                ds.append(None)
+                continue
+            parts = []
+            for j, cmd in ops:
+                move, line = edge_paths[j]
+                if cmd:
+                    parts.append(cmd + move)
+                parts.append(line)
+            parts.append('Z')
+            ds.append(' '.join(parts))
+        out.append(ds)
+    return out
+
+def _edge_path_data(stack, a, b, d, start, end):
+    '''Return the path data of each compiled edge placed by each transform
+    of stack as a nested list of (start point, draw command) strings.
+
+    The start point is only drawn at the start of a polygon's part where
+    the caller prepends its command letter.
+    '''
+    a, b, d = stack.apply_to_gcircle(a, b, d, all_pairs=True)
+    z1 = stack.apply_to_array(start, all_pairs=True)
+    z2 = stack.apply_to_array(end, all_pairs=True)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        center = -b / a
+        r = np.sqrt(np.maximum(abs(b)**2 - a*d, 0)) / abs(a)
+        # Match Path.arc in drawsvg and Transform.apply_to_shape
+        cw = (a > 0) != stack.conj[:, np.newaxis]
+        large_arc = ((np.angle(z2 - center, deg=True)
+                      - np.angle(z1 - center, deg=True)) % 360 <= 180) ^ cw
+    is_line = abs(a) <= util.epsilon * abs(b)
+    x1, y1, x2, y2, r, cw, large_arc, is_line = (
+            v.tolist() for v in (z1.real, z1.imag, z2.real, z2.imag, r,
+                                 cw.astype(int), large_arc.astype(int),
+                                 is_line))
+    return [[(f'{x1[i][j]},{y1[i][j]}',
+              f'L{x2[i][j]},{y2[i][j]}' if is_line[i][j] else
+              f'A{r[i][j]},{r[i][j]},0,{large_arc[i][j]},{cw[i][j]},'
+              f'{x2[i][j]},{y2[i][j]}')
+             for j in range(len(x1[i]))]
+            for i in range(len(x1))]
 
 class TileDecoratorLateInit(TileDecorator):
     def __init__(self):
@@ -0,0 +1,144 @@
+from math import floor
+
+from ..util import epsilon
+
+
+def edges_match(edge, other):
+    '''Return edge == other (see Edge.__eq__) without Point.__eq__ calls.'''
+    p1, p2, q1, q2 = edge.p1, edge.p2, other.p1, other.p2
+    x1, y1, x2, y2 = p1.x, p1.y, p2.x, p2.y
+    # The inverse edge of the neighbouring tile is most likely
+    return ((-epsilon <= x1 - q2.x <= epsilon
+             and -epsilon <= y1 - q2.y <= epsilon
+             and -epsilon <= x2 - q1.x <= epsilon
+             and -epsilon <= y2 - q1.y <= epsilon)
+            or (-epsilon <= x1 - q1.x <= epsilon
+                and -epsilon <= y1 - q1.y <= epsilon
+                and -epsilon <= x2 - q2.x <= epsilon
+                and -epsilon <= y2 - q2.y <= epsilon))
+
+
+class EdgeMap:
+    '''A hash map of edges for finding a matching edge in constant time.
+
+    Edges match, like Edge.__eq__, when their endpoints are within epsilon of
+    each other in either direction.  Edges are hashed by the grid cell of the
+    sum of their endpoints, which does not depend on the edge direction.  A
+    lookup of an edge whose sum is near a cell border also checks the nearby
+    cells.
+    '''
+    cell_size = 2**-20
+    def __init__(self, edges=()):
+        self._scale = 1 / self.cell_size
+        # Each cell holds an edge or, rarely, a list of edges
+        self._buckets = {}
+        self._len = 0
+        self.update(edges)
+    def __len__(self):
+        return self._len
+    def __iter__(self):
+        for bucket in self._buckets.values():
+            if type(bucket) is list:
+                yield from bucket
+            else:
+                yield bucket
+    def __contains__(self, edge):
+        '''Return True if this exact edge object is in the map.'''
+        bucket = self._buckets.get(self._key(edge))
+        return bucket is edge or (type(bucket) is list
+                                  and any(other is edge for other in bucket))
+    def _key(self, edge):
+        p1, p2 = edge.p1, edge.p2
+        scale = self._scale
+        return floor((p1.x + p2.x) * scale), floor((p1.y + p2.y) * scale)
+    def add(self, edge):
+        p1, p2 = edge.p1, edge.p2
+        scale = self._scale
+        key = floor((p1.x + p2.x) * scale), floor((p1.y + p2.y) * scale)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            self._buckets[key] = edge
+        elif type(bucket) is list:
+            bucket.append(edge)
+        else:
+            self._buckets[key] = [bucket, edge]
+        self._len += 1
+    def update(self, edges):
+        '''Add each edge in edges.'''
+        buckets, scale = self._buckets, self._scale
+        for edge in edges:
+            p1, p2 = edge.p1, edge.p2
+            key = floor((p1.x + p2.x) * scale), floor((p1.y + p2.y) * scale)
+            bucket = buckets.get(key)
+            if bucket is None:
+                buckets[key] = edge
+            elif type(bucket) is list:
+                bucket.append(edge)
+            else:
+                buckets[key] = [bucket, edge]
+            self._len += 1
+    def _find_in(self, key, edge):
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            return None
+        if type(bucket) is not list:
+            return bucket if edges_match(edge, bucket) else None
+        for other in bucket:
+            if edges_match(edge, other):
+                return other
+        return None
+    def _find(self, edge):
+        '''Return the key of the cell and the edge in the map that matches
+        edge or None.
+        '''
+        p1, p2 = edge.p1, edge.p2
+        scale = self._scale
+        fx, fy = (p1.x + p2.x) * scale, (p1.y + p2.y) * scale
+        kx, ky = floor(fx), floor(fy)
+        bucket = self._buckets.get((kx, ky))
+        if bucket is not None:
+            other = self._find_in((kx, ky), edge)
+            if other is not None:
+                return (kx, ky), other
+        # The endpoint sums of matching edges differ by at most 2*epsilon
+        near = 2 * epsilon * scale
+        if near <= fx - kx <= 1 - near and near <= fy - ky <= 1 - near:
+            return None
+        keys = {(floor(fx + sx), floor(fy + sy))
+                for sx in (-near, near) for sy in (-near, near)}
+        keys.discard((kx, ky))
+        for key in keys:
+            other = self._find_in(key, edge)
+            if other is not None:
+                return key, other
+        return None
+    def _remove(self, key, edge):
+        '''Remove this exact edge object from cell key and return True if it
+        was there.'''
+        bucket = self._buckets.get(key)
+        if bucket is edge:
+            del self._buckets[key]
+        elif type(bucket) is list and any(other is edge for other in bucket):
+            bucket = [other for other in bucket if other is not edge]
+            self._buckets[key] = bucket[0] if len(bucket) == 1 else bucket
+        else:
+            return False
+        self._len -= 1
+        return True
+    def find(self, edge):
+        '''Return the edge in the map that matches edge or None.'''
+        found = self._find(edge)
+        return None if found is None else found[1]
+    def pop(self, edge):
+        '''Remove and return the edge in the map that matches edge or None.'''
+        found = self._find(edge)
+        if found is None:
+            return None
+        self._remove(*found)
+        return found[1]
+    def discard(self, edge):
+        '''Remove this exact edge object from the map.
+
+        Returns True if the edge was in the map.
+        '''
+        return self._remove(self._key(edge), edge)
@@ -0,0 +1,208 @@
+'''Tile the plane in several processes by splitting it into angular sectors.
+
+The first rings are placed in this process.  Each worker then continues
+tiling from the whole boundary but only expands tiles that meet its sector,
+like the viewport of TileLayout.tile_plane.  A tile belongs to the sector
+that contains the mean of its vertices.  Tiles near a sector border may be
+placed by two workers so they are matched by position when the results are
+merged.  The results are returned as TileSet columns in shared memory.
+'''
+
+from concurrent.futures import ProcessPoolExecutor
+import math
+from multiprocessing import resource_tracker, shared_memory
+import os
+
+import numpy as np
+
+from ..poincare import Point
+from . import Edge, EdgeMap, TileSet
+from .tile_layout import _Frontier, tile_bounding_circle
+
+
+# Tiles with a center this close to a sector border (in radians) belong to
+# both sectors and are merged
+_angle_tolerance = 1e-9
+
+# Set in each worker process by _init_worker
+_worker_state = None
+
+
+def _center(tile):
+    return sum(complex(v.x, v.y) for v in tile.vertices) / len(tile.vertices)
+
+def _in_sector(z, sector, tolerance=0):
+    start, span = sector
+    return (math.atan2(z.imag, z.real) - start + tolerance) % (2*math.pi) <= (
+            span + 2*tolerance)
+
+def _circle_meets_sector(circle, sector):
+    center, r = circle
+    if abs(center) <= r or _in_sector(center, sector):
+        return True
+    start, span = sector
+    for angle in (start, start + span):
+        # Distance from center to the ray from the origin at angle
+        z = center * complex(math.cos(angle), -math.sin(angle))
+        if (abs(z.imag) if z.real > 0 else abs(z)) <= r:
+            return True
+    return False
+
+def _to_shared(arrays):
+    '''Copy a dict of arrays into one shared memory block.
+
+    Returns the block name and a list of (name, dtype, shape, offset).
+    '''
+    specs, size = [], 0
+    for name, arr in arrays.items():
+        specs.append((name, arr.dtype.str, arr.shape, size))
+        size += -(-arr.nbytes // 16) * 16
+    shm = shared_memory.SharedMemory(create=True, size=max(size, 1))
+    for name, dtype, shape, offset in specs:
+        np.ndarray(shape, dtype, shm.buf, offset)[...] = arrays[name]
+    shm.close()
+    return shm.name, specs
+
+def _from_shared(name, specs):
+    '''Copy the arrays out of a block made by _to_shared and free it.'''
+    shm = shared_memory.SharedMemory(name=name)
+    try:
+        return {key: np.ndarray(shape, dtype, shm.buf, offset).copy()
+                for key, dtype, shape, offset in specs}
+    finally:
+        shm.close()
+        shm.unlink()
+
+def _init_worker(layout, edges, seeds, ring, depth, min_size):
+    global _worker_state
+    _worker_state = layout, edges, seeds, ring, depth, min_size
+
+def _tile_sector(sector):
+    '''Tile one sector in a worker process.
+
+    Parents of tiles placed against the seed edges are encoded as -2 minus
+    the index of the seed's parent in the main process.
+    '''
+    layout, edges, seeds, ring, depth, min_size = _worker_state
+    def visible(tile):
+        return _circle_meets_sector(tile_bounding_circle(tile), sector)
+    frontier = _Frontier(EdgeMap(edges), [(edge, -2 - parent)
+                                          for edge, parent in seeds],
+                         ring=ring)
+    tile_set = TileSet()
+    rings, centers = [], []
+    while frontier.boundary and (depth is None or frontier.ring < depth):
+        for tile, j, parent, gen_index in layout._expand_ring(
+                frontier, visible, min_size=min_size):
+            tile_set.append(tile, parent=parent, gen_index=gen_index)
+            rings.append(j)
+            centers.append(_center(tile))
+    columns = tile_set._columns()
+    columns['ring'] = np.array(rings, dtype=np.int32)
+    columns['center'] = np.array(centers, dtype=np.complex128)
+    columns['owned'] = np.array([_in_sector(z, sector, _angle_tolerance)
+                                 for z in centers], dtype=bool)
+    # Decorators are copies in this process so refer to them by generator
+    decorators = [next((i for i, gen in enumerate(layout.gen_list)
+                        if gen[2] is decorator), None)
+                  for decorator in tile_set.decorators]
+    return _to_shared(columns), tile_set.codes, decorators
+
+def _center_key(z, index=None):
+    p = Point(z.real, z.imag)
+    return Edge(p, p, code=index)
+
+def _merge(results, layout, out, base):
+    '''Append the tiles from each worker to out in order of ring, worker,
+    and placement with duplicates removed and parents resolved.
+
+    base is the index in out of the first tile placed in the main process.
+    '''
+    parts, sizes = [], []
+    for (name, specs), codes, decorators in results:
+        columns = _from_shared(name, specs)
+        code_map = np.array([out._code_id(code) for code in codes] + [-1],
+                            dtype=np.int32)
+        columns['side_codes'] = code_map[columns['side_codes']]
+        decorator_map = np.array(
+                [-1 if i is None else out._decorator_id(layout.gen_list[i][2])
+                 for i in decorators] + [-1], dtype=np.int32)
+        columns['decorator'] = decorator_map[columns['decorator']]
+        parts.append(columns)
+        sizes.append(len(columns['ring']))
+    max_sides = max(part['vertices'].shape[1] for part in parts)
+    for part in parts:
+        sides = part['vertices'].shape[1]
+        if sides < max_sides:
+            n = len(part['ring'])
+            part['vertices'] = np.concatenate([part['vertices'], np.full(
+                    (n, max_sides - sides, 2), np.nan)], axis=1)
+            part['side_codes'] = np.concatenate([part['side_codes'], np.full(
+                    (n, max_sides - sides), -1, dtype=np.int32)], axis=1)
+    columns = {key: np.concatenate([part[key] for part in parts])
+               for key in parts[0]}
+    worker = np.repeat(np.arange(len(parts)), sizes)
+    starts = np.cumsum([0] + sizes[:-1])
+    local = np.arange(len(worker)) - starts[worker]
+    order = np.lexsort((local, worker, columns['ring']))
+    # Give each distinct owned tile its index in the output
+    centers = EdgeMap()
+    keep = []
+    first = len(out)
+    for k in order:
+        if columns['owned'][k]:
+            key = _center_key(columns['center'][k], first + len(keep))
+            if centers.find(key) is None:
+                centers.add(key)
+                keep.append(k)
+    def global_index(k):
+        match = centers.find(_center_key(columns['center'][k]))
+        return -1 if match is None else match.code
+    keep = np.array(keep, dtype=np.intp)
+    parent = columns['parent'][keep].copy()
+    for i, k in enumerate(keep):
+        p = parent[i]
+        if p <= -2:
+            parent[i] = base - 2 - p
+        elif p >= 0:
+            parent[i] = global_index(starts[worker[k]] + p)
+    columns = {key: columns[key][keep] for key in TileSet._column_names}
+    columns['parent'] = parent
+    out._extend_columns(columns)
+
+def tile_plane(layout, start_tile, depth=2, out=None, min_size=None,
+               workers=None, split_depth=2):
+    '''Return a TileSet with the tiles of layout.tile_plane placed by a pool
+    of workers processes.
+
+    The first split_depth rings are placed in this process.  The tiles are in
+    order of ring but may be in a different order within a ring.
+    '''
+    if out is None:
+        out = TileSet()
+    if workers is None:
+        workers = os.cpu_count() or 1
+    base = len(out)
+    if workers <= 1 or (depth is not None and depth <= split_depth):
+        return layout.tile_plane(start_tile, depth, out=out, min_size=min_size)
+    out.append(start_tile)
+    frontier = _Frontier(EdgeMap(start_tile.sides),
+                         [(side, 0) for side in start_tile.sides], count=1)
+    while frontier.boundary and frontier.ring < split_depth:
+        for tile, _, parent, gen_index in layout._expand_ring(
+                frontier, min_size=min_size):
+            out.append(tile, parent=base + parent, gen_index=gen_index)
+    if not frontier.boundary:
+        return out
+    sectors = [(2*math.pi*i/workers, 2*math.pi/workers)
+               for i in range(workers)]
+    # Workers share this process's resource tracker so the shared memory
+    # they create is only tracked until it is unlinked here
+    resource_tracker.ensure_running()
+    with ProcessPoolExecutor(
+            workers, initializer=_init_worker,
+            initargs=(layout, list(frontier.edges), list(frontier.boundary),
+                      frontier.ring, depth, min_size)) as pool:
+        results = list(pool.map(_tile_sector, sectors))
+    _merge(results, layout, out, base)
+    return out
@@ -22,12 +22,22 @@ def hyp_poly_edge_construct(p, q):
     return r
 
 
+def _outlines():
+    '''Return the decorator that draws tiles without a decorator.'''
+    global _outline_decorator
+    if _outline_decorator is None:
+        from .decorator import TileDecorator
+        _outline_decorator = TileDecorator()
+    return _outline_decorator
+_outline_decorator = None
+
+
 class Tile:
     def __init__(self, vertices, touching_side=None, trans=Transform.identity(),
                  decorator=None):
         self.vertices = vertices
-        self.sides = [Edge(vertices[i],vertices[(i+1)%len(self.vertices)])
-                      for i in range(len(self.vertices))]
+        self.sides = [Edge(v1, v2)
+                      for v1, v2 in zip(vertices, vertices[1:] + vertices[:1])]
         self.touching_side = touching_side
         self.trans = trans
         self.decorator = decorator
@@ -43,9 +53,7 @@ class Tile:
         if self.decorator is None:
             draw_verts = kwargs.get('draw_verts', False)
             if not draw_verts:
-                poly = self.to_polygon()
-                d = poly.to_drawables(**kwargs)
-                return d
+                return _outlines().to_drawables(tile=self, **kwargs)
             elif draw_verts:
                 lst = []
                 for v in self.vertices:
@@ -62,8 +70,8 @@ class Tile:
         if touching_side is None:
             return self.sides
         sides = self.sides
-        return [sides[(i+touching_side)%len(sides)]
-                for i in range(len(sides))]
+        touching_side %= len(sides)
+        return sides[touching_side:] + sides[:touching_side]
     def permuted_vertices(self, touching_side=None):
         if touching_side is None:
             touching_side = self.touching_side
@@ -0,0 +1,44 @@
+import numpy as np
+
+
+class TileAdjacency:
+    '''The neighbours of each tile of a tiling in compressed sparse row form.
+
+    The neighbours of tile i are entries indptr[i] to indptr[i+1] of side,
+    neighbor, and neighbor_side, sorted by side: side side[k] of tile i is
+    shared with side neighbor_side[k] of tile neighbor[k].  Sides without a
+    neighbour in the tiling have no entry.
+
+    Pass an instance as the adjacency argument of TileLayout.tile_plane to
+    record the sides matched while tiling.
+    '''
+    def __init__(self):
+        self.indptr = np.zeros(1, dtype=np.intp)
+        self.side = np.zeros(0, dtype=np.int32)
+        self.neighbor = np.zeros(0, dtype=np.intp)
+        self.neighbor_side = np.zeros(0, dtype=np.int32)
+        self._pairs = np.zeros((0, 4), dtype=np.intp)
+    def __len__(self):
+        '''Return the number of tiles.'''
+        return len(self.indptr) - 1
+    def __repr__(self):
+        return '{}({} tiles, {} pairs)'.format(
+                type(self).__name__, len(self), len(self._pairs))
+    def neighbors(self, i):
+        '''Return a list of (side, neighbor, neighbor side) for tile i.'''
+        start, end = self.indptr[i], self.indptr[i+1]
+        return list(zip(self.side[start:end].tolist(),
+                        self.neighbor[start:end].tolist(),
+                        self.neighbor_side[start:end].tolist()))
+    def _add_pairs(self, pairs, n):
+        '''Add (tile, side, other tile, other side) rows and rebuild the arrays
+        for n tiles.
+        '''
+        pairs = np.asarray(pairs, dtype=np.intp).reshape(-1, 4)
+        self._pairs = np.concatenate([self._pairs, pairs])
+        both = np.concatenate([self._pairs, self._pairs[:, [2, 3, 0, 1]]])
+        both = both[np.lexsort((both[:, 1], both[:, 0]))]
+        self.indptr = np.searchsorted(both[:, 0], np.arange(n + 1))
+        self.side = both[:, 1].astype(np.int32)
+        self.neighbor = both[:, 2]
+        self.neighbor_side = both[:, 3].astype(np.int32)
@@ -0,0 +1,77 @@
+import hashlib
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+from . import TileSet
+
+
+class TileCache:
+    '''A directory of tilings saved by TileSet.save, keyed by everything that
+    determines the tiles.
+
+    The key is a hash of the layout class and its cache_params, the vertices
+    and side codes of each tile generator and of the start tile, the depth
+    and min_size, and version.  Increase version when a change to the library changes the
+    generated tiles.  Decorators are not part of the key and are taken from
+    the layout when a tiling is loaded.
+
+    Loaded tilings are memory-mapped by default so iterating over them
+    creates tiles without reading the whole tiling.
+    '''
+    version = 1
+    def __init__(self, directory, mmap_mode='r'):
+        self.directory = directory
+        self.mmap_mode = mmap_mode
+    def key(self, layout, start_tile, depth=2, min_size=None):
+        '''Return the hex digest that names a tiling in the cache.'''
+        def tile_params(tile):
+            return ([(v.x, v.y) for v in tile.vertices],
+                    [side.code for side in tile.sides])
+        cls = type(layout)
+        params = (self.version, cls.__module__, cls.__qualname__,
+                  layout.cache_params(),
+                  [(tile_params(tile_gen.center_tile),
+                    tile_params(tile_gen.corner_tile), list(codes))
+                   for tile_gen, codes, _ in layout.gen_list],
+                  tile_params(start_tile), depth, min_size)
+        return hashlib.sha256(repr(params).encode()).hexdigest()
+    def path(self, layout, start_tile, depth=2, min_size=None):
+        return os.path.join(self.directory,
+                            self.key(layout, start_tile, depth, min_size))
+    def tile_plane(self, layout, start_tile, depth=2, min_size=None):
+        '''Return a TileSet of layout.tile_plane, loading it from the cache
+        if it was already generated and saving it otherwise.
+        '''
+        path = self.path(layout, start_tile, depth, min_size)
+        if os.path.isdir(path):
+            gens = np.load(os.path.join(path, 'decorator_gens.npy'))
+            return TileSet.load(
+                    path, mmap_mode=self.mmap_mode,
+                    decorators=[start_tile.decorator if i < 0
+                                else layout.gen_list[i][2] for i in gens])
+        tile_set = layout.tile_plane(start_tile, depth, out=TileSet(),
+                                     min_size=min_size)
+        # Decorators are saved as the index of their generator
+        gens = [next((i for i, gen in enumerate(layout.gen_list)
+                      if gen[2] is decorator), -1)
+                for decorator in tile_set.decorators]
+        # Save to a temporary directory first so a partly written tiling is
+        # never loaded
+        os.makedirs(self.directory, exist_ok=True)
+        tmp = tempfile.mkdtemp(dir=self.directory, prefix='.tmp-')
+        try:
+            tile_set.save(os.path.join(tmp, 'tiles'))
+            np.save(os.path.join(tmp, 'tiles', 'decorator_gens.npy'),
+                    np.array(gens, dtype=np.int32))
+            try:
+                os.rename(os.path.join(tmp, 'tiles'), path)
+            except OSError:
+                if not os.path.isdir(path):
+                    raise
+                # Another process saved the same tiling first
+        finally:
+            shutil.rmtree(tmp)
+        return tile_set
@@ -1,4 +1,4 @@
-from ..poincare import Transform
+from ..poincare import Point, Transform
 from . import Tile
 
 
@@ -6,6 +6,7 @@ class TileGen:
     def __init__(self, center_tile, corner_tile):
         self.center_tile = center_tile
         self.corner_tile = corner_tile
+        self._side_placements = {}
     @staticmethod
     def from_center_tile(center_tile):
         trans_to_origin = Transform.shift_origin(
@@ -31,16 +32,49 @@ class TileGen:
     def placed_against_tile(self, tile, side, touching_side=0):
         return self.placed_against_edge(
                 tile.sides[side], touching_side=touching_side)
+    def side_transform(self, touching_side):
+        '''Return the transform that moves side touching_side of the corner
+        tile to side 0.
+        '''
+        return self._side_placement(touching_side)[0]
+    def _side_placement(self, touching_side):
+        '''Return the transform from side_transform, the complex vertices
+        of the corner tile moved by it, and the corner tile's transform
+        merged with it, cached for each touching_side.
+
+        The cache assumes corner_tile is not modified.
+        '''
+        placement = self._side_placements.get(touching_side)
+        if placement is None:
+            vertices = self.corner_tile.vertices
+            if touching_side == 0:
+                trans = Transform.identity()
+            else:
+                trans = Transform.shift_origin(
+                    vertices[touching_side],
+                    vertices[(touching_side+1)%len(vertices)])
+                vertices = trans.apply_to_list(vertices)
+            placement = self._side_placements[touching_side] = (
+                    trans, [complex(v.x, v.y) for v in vertices],
+                    Transform.merge(self.corner_tile.trans, trans))
+        return placement
     def placed_against_edge(self, edge, touching_side=0):
-        trans = Transform.translation(edge.p2, edge.p1)
-        if touching_side != 0:
-            trans_to_side = Transform.shift_origin(
-                self.corner_tile.vertices[touching_side],
-                self.corner_tile.vertices[
-                    (touching_side+1)%len(self.corner_tile.vertices)])
-            trans = Transform.merge(trans_to_side, trans)
-        tile = self.tile_with_transform(trans)
-        tile.touching_side = touching_side
+        side_trans, zs, corner_trans = self._side_placement(touching_side)
+        # Transform.translation(edge.p2, edge.p1) without the intermediate
+        # shift_origin transform
+        p1, p2 = edge.p1, edge.p2
+        z0 = complex(p2.x, p2.y)
+        c = -z0.conjugate()
+        e = (c*complex(p1.x, p1.y) + 1) / (complex(p1.x, p1.y) - z0)
+        e /= abs(e)
+        a, b, d = -1, -z0*e, -e
+        # The translation keeps the disk inside the disk so there is no pole
+        # to check for
+        vertices = [Point(z.real, z.imag)
+                    for z in [(a*z + b) / (c*z + d) for z in zs]]
+        tile = self.corner_tile.make_new(
+                vertices, touching_side=touching_side,
+                trans=Transform.merge(corner_trans, Transform(a, b, c, d)))
         return tile
     def make_gen_with_permuted_edges(self, new_base_side_index):
         center_tile = self.center_tile.make_permuted(new_base_side_index)
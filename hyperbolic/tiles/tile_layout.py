@@ -1,58 +1,490 @@
+from collections import deque
+import math
+
+import numpy as np
+
+from ..poincare import Transform
+from . import EdgeMap
+from .edge_map import edges_match
+
+
+class _BoundaryEdge:
+    '''A side of a placed tile on the boundary of a combinatorial tiling.
+
+    Boundary edges form a circular linked list.  count is the number of tiles
+    around the vertex at the end of this edge.  prev is None once the edge is
+    no longer on the boundary.
+    '''
+    __slots__ = ('tile', 'side', 'place', 'count', 'prev', 'next')
+    def __init__(self, tile, side, place, count=1):
+        self.tile = tile
+        self.side = side
+        self.place = place
+        self.count = count
+        self.prev = None
+        self.next = None
+
+class _Frontier:
+    '''The unmatched edges around a partially placed tiling.
+
+    edges holds every unmatched edge, including the sides of tiles that are
+    not expanded so new tiles are still matched against them.  boundary holds
+    the (edge, parent index) pairs to place tiles against in the next ring.
+    count is the number of tiles yielded so far.  Hidden tiles have index -1.
+    '''
+    def __init__(self, edges, boundary, ring=0, count=0, owners=None,
+                 pairs=None):
+        self.edges = edges
+        self.boundary = deque(boundary)
+        self.ring = ring
+        self.count = count
+        # If not None, owners maps id(edge) to (tile index, side index) for
+        # every edge in edges and matched sides are appended to pairs
+        self.owners = owners
+        self.pairs = pairs
+
+def _link(edges):
+    for e1, e2 in zip(edges[:-1], edges[1:]):
+        e1.next = e2
+        e2.prev = e1
+
+def _vertex_count(tile):
+    '''Return q if every vertex angle of tile is 2*pi/q for an integer q.'''
+    p = len(tile.vertices)
+    counts = []
+    for i in range(p):
+        trans = Transform.shift_origin(tile.vertices[i])
+        x1, y1 = trans.apply_to_tuple(tile.vertices[(i+1)%p])
+        x2, y2 = trans.apply_to_tuple(tile.vertices[i-1])
+        angle = abs(math.atan2(x1*y2 - y1*x2, x1*x2 + y1*y2))
+        counts.append(2*math.pi / angle)
+    q = round(counts[0])
+    if any(abs(count - q) > 1e-6 for count in counts):
+        raise ValueError('Tile vertex angles must all equal 2*pi/q')
+    if (p - 2) * (q - 2) <= 4:
+        raise ValueError('Tiling must be hyperbolic')
+    return q
+
+def tile_size(tile, transform=None):
+    '''Return the larger of the width and height of a tile's vertices in the
+    disk, or after transform if given.
+    '''
+    if transform is None:
+        xs = [v.x for v in tile.vertices]
+        ys = [v.y for v in tile.vertices]
+    else:
+        xs, ys = zip(*map(transform.apply_to_tuple, tile.vertices))
+    return max(max(xs) - min(xs), max(ys) - min(ys))
+
+def tile_bounding_circle(tile, transform=None):
+    '''Return the complex center and radius of a euclidean circle that
+    contains tile, or None if the circle would contain the pole of transform.
+
+    The circle is the hyperbolic circle around the mean of the vertices
+    through the farthest vertex, which contains the whole tile because it is
+    convex.
+    '''
+    z = [complex(v.x, v.y) for v in tile.vertices]
+    c = sum(z) / len(z)
+    # tanh(d/2) of the hyperbolic distance d to the farthest vertex
+    rho = max(abs((zi - c) / (1 - c.conjugate()*zi)) for zi in z)
+    c2 = abs(c)**2
+    center = c * (1 - rho**2) / (1 - c2*rho**2)
+    r = rho * (1 - c2) / (1 - c2*rho**2)
+    if transform is not None:
+        return transform.apply_to_circle(center, r)
+    return center, r
+
+def _circle_meets_box(circle, box):
+    if circle is None:
+        return True
+    center, r = circle
+    x_min, y_min, x_max, y_max = box
+    dx = max(x_min - center.real, 0, center.real - x_max)
+    dy = max(y_min - center.imag, 0, center.imag - y_max)
+    return dx*dx + dy*dy <= r*r
+
+def _check_bounded(depth, min_size):
+    if depth is None and min_size is None:
+        raise ValueError('Expected depth or min_size to end the tiling. '
+                         'Got depth=None and min_size=None.')
+
+def _beyond_meets_box(tile, edge, box, transform):
+    '''Return False only if no point beyond the geodesic through edge, on
+    the side away from tile, is in box.
+    '''
+    z1, z2 = complex(edge.p1.x, edge.p1.y), complex(edge.p2.x, edge.p2.y)
+    # The geodesic is a circle orthogonal to the unit circle, so its center c
+    # satisfies 2*Re(c*conj(z)) = 1 + |z|**2 for both endpoints
+    det = 2 * (z1.real*z2.imag - z1.imag*z2.real)
+    if abs(det) <= 1e-9:
+        return True  # Close to a diameter
+    b1, b2 = 1 + abs(z1)**2, 1 + abs(z2)**2
+    c = complex((b1*z2.imag - b2*z1.imag) / det,
+                (z1.real*b2 - z2.real*b1) / det)
+    r = math.sqrt(abs(c)**2 - 1)
+    mean = sum(complex(v.x, v.y) for v in tile.vertices) / len(tile.vertices)
+    if abs(mean - c) < r:
+        # The far side is most of the disk
+        c, r = 0j, 1
+    circle = (c, r) if transform is None else transform.apply_to_circle(c, r)
+    return _circle_meets_box(circle, box)
+
+
 class TileLayout:
     '''
     Override this class and implement the calc* methods to create a custom
     layout.
     '''
+    # Maps each code to the placement rule of _place_tile when compiled
+    _rules = None
     def __init__(self, gen_list=None):
         self.gen_list = [] if gen_list is None else gen_list
     def add_generator(self, tile_gen, side_codes, decorator=None):
         self.gen_list.append([tile_gen, side_codes, decorator])
+        self._rules = None
     def set_decorator(self, decorator, gen_index):
         self.gen_list[gen_index][2] = decorator
-    def tile_plane(self, start_tile, depth=2):
-        tiles = [start_tile]
-        boundary = list(start_tile.sides)
-        for j in range(depth):
-            boundary2 = []
-            i = 0
-            while i < len(boundary):
-                tile = self.place_tile(boundary[i])
-                tiles.append(tile)
-                sides = tile.permuted_sides()
-                o = 1
-                p = len(sides)
-                if i == 0:
-                    if sides[o] == boundary[-1]:
-                        o += 1
-                        boundary.pop()
-                else:
-                    if sides[o] == boundary2[-1]:
-                        o += 1
-                        boundary2.pop()
-                    if sides[p-1] == boundary[(i + 1) % len(boundary)]:
-                        p -= 1
-                        i += 1
-                    if sides[p-1] == boundary2[0]:
-                        p -= 1
-                        boundary2.pop(0)
-                boundary2.extend(sides[o:p])
-                i += 1
-            boundary = boundary2
+        self._rules = None
+    def compile_rules(self, codes=None, max_codes=10000):
+        '''Look up the calc_* methods for every side code once so placing a
+        tile only needs a dict lookup.
+
+        Only use this if the calc_* methods depend on nothing but their
+        arguments.  codes are the side codes to compile.  By default they are
+        the codes of each generator and every code reachable from them,
+        which must be hashable and number at most max_codes.  Tiles against
+        other codes still use the calc_* methods.  Changing the generators
+        clears the rules.
+        '''
+        if codes is None:
+            pending = [code for _, default_codes, _ in self.gen_list
+                       for code in default_codes]
+        else:
+            pending = list(codes)
+        self._rules = None
+        rules = {}
+        while pending:
+            code = pending.pop()
+            if code in rules:
+                continue
+            if len(rules) >= max_codes:
+                raise ValueError(f'Expected at most {max_codes} side codes')
+            rule = self._rule(code)
+            rules[code] = rule[:3] + (tuple(rule[3]),) + rule[4:]
+            if codes is None:
+                pending.extend(rule[3])
+        self._rules = rules
+    def tile_plane(self, start_tile, depth=2, out=None, min_size=None,
+                   viewport=None, transform=None, adjacency=None):
+        '''Return a list of tiles covering the plane out to depth rings
+        around start_tile.
+
+        If min_size is given, tiles smaller than min_size (see tile_size) are
+        not expanded further.  Use depth=None to stop only at small tiles,
+        which requires min_size.
+        For a drawing scaled by s pixels per unit, min_size=1/s stops at tiles
+        smaller than a pixel.
+
+        If viewport is given as (x_min, y_min, x_max, y_max), only tiles whose
+        bounding circle (see tile_bounding_circle) meets the viewport are
+        returned.  Hidden tiles are only expanded through the sides that face
+        the viewport.  transform maps the disk to the viewport and min_size
+        coordinates, e.g. Transform.disk_to_half().
+
+        If out is a TileSet, the tiles are appended to it with their parent
+        and generator indices and it is returned instead.
+
+        If adjacency is a TileAdjacency, the sides shared by the returned
+        tiles are added to it as they are matched.
+        '''
+        _check_bounded(depth, min_size)
+        pairs = None if adjacency is None else []
+        placed = self._place_tiles(
+                start_tile, depth, min_size, viewport, transform, pairs)
+        if out is None:
+            tiles = [tile for tile, _, _, _ in placed]
+            base, n = 0, len(tiles)
+        else:
+            tiles = out
+            base = len(out)
+            for tile, _, parent, gen_index in placed:
+                out.append(tile, parent=parent if parent < 0
+                                        else base + parent,
+                           gen_index=gen_index)
+            n = len(out)
+        if adjacency is not None:
+            pairs = np.reshape(np.array(pairs, dtype=np.intp), (-1, 4))
+            adjacency._add_pairs(pairs + (base, 0, base, 0), n)
         return tiles
+    def tile_plane_parallel(self, start_tile, depth=2, out=None,
+                            min_size=None, workers=None, split_depth=2):
+        '''Return a TileSet with the same tiles as tile_plane placed by a
+        pool of worker processes (by default one per CPU).
+
+        After split_depth rings, the plane is split into one angular sector
+        per worker.  Tiles are returned in order of ring but may be in a
+        different order within a ring.  The layout must be picklable if
+        processes are not started by fork.
+        '''
+        _check_bounded(depth, min_size)
+        from . import parallel
+        return parallel.tile_plane(self, start_tile, depth, out, min_size,
+                                   workers, split_depth)
+    def iter_tiles(self, start_tile, depth=None, rings=False, min_size=None,
+                   viewport=None, transform=None):
+        '''Yield the tiles of tile_plane as soon as they are placed.
+
+        With depth=None, tiles are generated until the caller stops.  Only the
+        edges on the boundary of the tiling are kept so memory is proportional
+        to one ring.  If rings is True, yield a list of tiles for each ring
+        instead, starting with [start_tile] (rings with no visible tiles are
+        skipped).
+        '''
+        placed = self._place_tiles(
+                start_tile, depth, min_size, viewport, transform)
+        if not rings:
+            for tile, _, _, _ in placed:
+                yield tile
+            return
+        ring_tiles, ring = [], 0
+        for tile, j, _, _ in placed:
+            if j != ring and ring_tiles:
+                yield ring_tiles
+                ring_tiles = []
+            ring = j
+            ring_tiles.append(tile)
+        if ring_tiles:
+            yield ring_tiles
+    def _place_tiles(self, start_tile, depth, min_size=None, viewport=None,
+                     transform=None, pairs=None):
+        '''Yield (tile, ring, parent index, generator index) for each tile
+        in the order of tile_plane.
+
+        If pairs is a list, (tile index, side, other tile index, other side)
+        is appended to it for each pair of matched sides.
+        '''
+        frontier, visible, toward = self._start_frontier(
+                start_tile, viewport, transform, pairs)
+        # The start tile is counted if it is visible
+        if frontier.count:
+            yield start_tile, 0, -1, -1
+        while frontier.boundary and (depth is None or frontier.ring < depth):
+            yield from self._expand_ring(
+                    frontier, visible, toward, min_size, transform)
+    def _start_frontier(self, start_tile, viewport=None, transform=None,
+                        pairs=None):
+        '''Return a _Frontier around start_tile and the visible and toward
+        functions to pass to _expand_ring.
+
+        The start tile is counted in frontier.count if it is visible.
+        visible is None without a viewport.
+        '''
+        def visible(tile):
+            return viewport is None or _circle_meets_box(
+                    tile_bounding_circle(tile, transform), viewport)
+        def toward(tile, side):
+            # Search through the sides of hidden tiles that face the
+            # viewport
+            return _beyond_meets_box(tile, side, viewport, transform)
+        show = visible(start_tile)
+        frontier = _Frontier(
+                EdgeMap(start_tile.sides),
+                [(side, 0 if show else -1) for side in start_tile.sides
+                 if show or toward(start_tile, side)],
+                count=int(show),
+                owners=None if pairs is None else {
+                        id(side): (0 if show else -1, i)
+                        for i, side in enumerate(start_tile.sides)},
+                pairs=pairs)
+        return frontier, None if viewport is None else visible, toward
+    def _expand_ring(self, frontier, visible=None, toward=None,
+                     min_size=None, transform=None):
+        '''Place a tile against each edge of frontier.boundary and yield
+        (tile, ring, parent index, generator index) for each visible tile.
+
+        frontier.boundary is replaced by the sides of the new tiles to expand.
+        Hidden tiles are expanded through the sides where toward(tile, side)
+        is True, or not at all if toward is None.
+        '''
+        edges, count = frontier.edges, frontier.count
+        owners = frontier.owners
+        frontier.ring += 1
+        j = frontier.ring
+        boundary, boundary2 = frontier.boundary, deque()
+        # The last side of the previous tile is only added to edges and
+        # boundary2 if the next tile doesn't match it, which it usually does
+        pending = None
+        while boundary:
+            edge, parent = boundary.popleft()
+            if not edges.discard(edge):
+                continue
+            tile, gen_index = self._place_tile(edge)
+            show = visible is None or visible(tile)
+            if show:
+                yield tile, j, parent, gen_index
+                index = count
+                count += 1
+            else:
+                index = -1
+            # Sides shared with earlier tiles are next to the touching side.
+            # They are usually the last side of the previous tile and the
+            # next edge of the boundary so the hash map is only searched,
+            # until the first unmatched side, when those don't match.
+            sides = tile.permuted_sides()
+            o, p = 1, len(sides)
+            matched = None if owners is None else [(0, edge)]
+            if pending is not None and p > 1 and edges_match(
+                    sides[1], pending[0]):
+                if owners is not None:
+                    matched.append((1, pending[0]))
+                o = 2
+            else:
+                if pending is not None:
+                    edges.add(pending[0])
+                    if pending[2]:
+                        boundary2.append(pending[:2])
+                while o < p:
+                    other = edges.pop(sides[o])
+                    if other is None:
+                        break
+                    if owners is not None:
+                        matched.append((o, other))
+                    o += 1
+            pending = None
+            if (o < p and boundary and edges_match(sides[p-1], boundary[0][0])
+                    and edges.discard(boundary[0][0])):
+                if owners is not None:
+                    matched.append((p-1, boundary[0][0]))
+                boundary.popleft()
+                p -= 1
+            else:
+                while o < p:
+                    other = edges.pop(sides[p-1])
+                    if other is None:
+                        break
+                    if owners is not None:
+                        matched.append((p-1, other))
+                    p -= 1
+            if owners is not None:
+                t, n = tile.touching_side or 0, len(sides)
+                for k, other in matched:
+                    other_index, other_side = owners.pop(id(other))
+                    if index >= 0 and other_index >= 0:
+                        frontier.pairs.append(
+                                (index, (k+t) % n, other_index, other_side))
+                for k in range(o, p):
+                    owners[id(sides[k])] = (index, (k+t) % n)
+            if o == p:
+                continue
+            # Sides of small tiles are only kept to be matched
+            if not (min_size is None
+                    or tile_size(tile, transform) >= min_size):
+                expand = ()
+            elif show:
+                expand = sides[o:p]
+            elif toward is None:
+                expand = ()
+            else:
+                expand = [side for side in sides[o:p] if toward(tile, side)]
+            edges.update(sides[o:p-1])
+            pending = sides[p-1], index, expand and expand[-1] is sides[p-1]
+            boundary2.extend([(side, index) for side in expand
+                              if side is not pending[0]])
+        if pending is not None:
+            edges.add(pending[0])
+            if pending[2]:
+                boundary2.append(pending[:2])
+        frontier.boundary = boundary2
+        frontier.count = count
+    def iter_regular_tiles(self, start_tile, depth=2):
+        '''Yield the same tiles as iter_tiles for a layout with one regular
+        tile generator, such as one from TileGen.make_regular.
+
+        Neighbouring tiles are found by counting the tiles around each
+        boundary vertex instead of comparing edges and each tile's transform
+        is computed from its parent's so no geometry is compared.
+        '''
+        if len(self.gen_list) != 1:
+            raise ValueError('Expected a layout with one tile generator')
+        tile_gen, _, decorator = self.gen_list[0]
+        center_tile = tile_gen.center_tile
+        p = len(center_tile.vertices)
+        q = _vertex_count(center_tile)
+        # Transform of a tile placed against each side of the center tile
+        relative = {}
+        center_inv = center_tile.trans.inverted()
+        yield start_tile
+        start_place = Transform.merge(center_inv, start_tile.trans)
+        ring = [_BoundaryEdge(start_tile, i, start_place) for i in range(p)]
+        _link(ring + ring[:1])
+        j = 0
+        while depth is None or j < depth:
+            j += 1
+            ring2 = []
+            for edge in ring:
+                if edge.prev is None:
+                    continue
+                code = edge.tile.sides[edge.side].code
+                _, _, touch_side, side_codes, _ = self._rule(code)
+                key = edge.side, touch_side
+                if key not in relative:
+                    ref = tile_gen.placed_against_tile(
+                            center_tile, edge.side, touching_side=touch_side)
+                    relative[key] = Transform.merge(center_inv, ref.trans)
+                place = Transform.merge(relative[key], edge.place)
+                tile = center_tile.make_transformed(place)
+                tile.touching_side = touch_side
+                tile.set_side_codes(side_codes)
+                tile.decorator = decorator
+                yield tile
+                # The new tile touches the vertices at both ends of edge.
+                # Glue its sides to the neighbouring boundary edges while
+                # those vertices are surrounded by q tiles.
+                before, after = edge.prev, edge.next
+                edge.prev = None
+                before.count += 1
+                end_count = edge.count + 1
+                o, k = 1, p
+                while o < k and before.count == q:
+                    before.prev.count += 1
+                    before.prev, before = None, before.prev
+                    o += 1
+                while o < k and end_count == q:
+                    end_count = after.count + 1
+                    after.prev, after = None, after.next
+                    k -= 1
+                new_edges = [_BoundaryEdge(tile, (i+touch_side) % p, place)
+                             for i in range(o, k)]
+                new_edges[-1].count = end_count
+                _link([before] + new_edges + [after])
+                ring2.extend(new_edges)
+            ring = ring2
     def place_tile(self, edge):
         '''Return a tile placed against edge according to the placement rules.
         '''
-        code = edge.code
+        return self._place_tile(edge)[0]
+    def _place_tile(self, edge):
+        gen_index, tile_gen, touch_side, side_codes, decorator = self._rule(
+                edge.code)
+        tile = tile_gen.placed_against_edge(edge, touching_side=touch_side)
+        tile.set_side_codes(side_codes)
+        tile.decorator = decorator
+        return tile, gen_index
+    def _rule(self, code):
+        '''Return the generator index, generator, touching side, side codes,
+        and decorator of a tile placed against a side with code.
+        '''
+        if self._rules is not None:
+            rule = self._rules.get(code)
+            if rule is not None:
+                return rule
         gen_index = self.calc_gen_index(code)
         tile_gen, default_codes, decorator = self.gen_list[gen_index][0:3]
-        touch_side_index = self.calc_tile_touch_side(code, gen_index)
+        touch_side = self.calc_tile_touch_side(code, gen_index)
         side_codes = self.calc_side_codes(
-                code, gen_index, touch_side_index, default_codes)
-        tile = tile_gen.placed_against_edge(
-                edge, touching_side=touch_side_index)
-        tile.set_side_codes(side_codes)
-        tile.decorator = decorator
-        return tile
+                code, gen_index, touch_side, default_codes)
+        return gen_index, tile_gen, touch_side, side_codes, decorator
     def start_tile(self, code=0, gen_index=None, side_codes=None, rotate_deg=0,
                    center_corner=False):
         if gen_index is None:
@@ -87,3 +519,10 @@ class TileLayout:
         Override in subclass to control tile side codes.
         '''
         return default_codes
+    def cache_params(self):
+        '''
+        Override in subclass to return the attributes read by the calc*
+        methods, as a value with a stable repr, so TileCache keeps tilings
+        of layouts with different attributes apart.
+        '''
+        return None
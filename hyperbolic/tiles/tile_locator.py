@@ -0,0 +1,129 @@
+import numpy as np
+
+from ..poincare import Point, PointArray
+
+
+class TileLocator:
+    '''Find the tile of a TileSet that contains a point.
+
+    A query walks from a start tile to a neighbour (see TileAdjacency) across
+    a side whose geodesic separates the current tile from the point until no
+    side does.  The number of steps is about the number of rings between the
+    start tile and the point.  Queries for an array of points walk together
+    with numpy.  Points whose walk leaves the tiling, because they are
+    outside it or the tiling is not convex (e.g. made with min_size), are
+    looked up in all tiles.
+    '''
+    # Points at most this far outside a tile (in euclidean distance) are
+    # treated as inside it
+    tolerance = 1e-12
+    # The number of side values to compute at once when searching all tiles
+    search_chunk = 2**16
+    def __init__(self, tile_set, adjacency):
+        if len(adjacency) != len(tile_set):
+            raise ValueError(f'Expected adjacency for {len(tile_set)} tiles. '
+                             f'Got {len(adjacency)}.')
+        z = tile_set.vertices[..., 0] + 1j*tile_set.vertices[..., 1]
+        z1, z2 = z, np.roll(z, -1, axis=1)
+        # Shift the wrapped around vertex of tiles with fewer sides
+        n_sides = tile_set.n_sides
+        rows = np.arange(len(z))
+        z2[rows, n_sides-1] = z[rows, 0]
+        # Each side's geodesic is the zero set of
+        #   f(w) = alpha*(|w|**2 + 1) - 2*Re(conj(beta)*w)
+        # which is a circle orthogonal to the unit circle or a diameter
+        alpha = 2 * (z1.real*z2.imag - z1.imag*z2.real)
+        b1, b2 = 1 + abs(z1)**2, 1 + abs(z2)**2
+        beta = ((b1*z2.imag - b2*z1.imag)
+                + 1j*(z1.real*b2 - z2.real*b1))
+        # Scale f to about twice the euclidean distance from the geodesic
+        # and make it positive inside the tile
+        scale = np.sqrt(abs(abs(beta)**2 - alpha**2))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            alpha, beta = alpha/scale, beta/scale
+            mean = np.nanmean(z, axis=1)[:, None]
+            sign = np.sign(self._side_values(alpha, beta, mean))
+        self._alpha = np.where(np.isnan(alpha), 0, alpha * sign)
+        self._beta = np.where(np.isnan(beta), 0, beta * sign)
+        # Padding sides are never crossed
+        self._gamma = np.where(np.isnan(alpha), np.inf, 0)
+        self._neighbor = np.full(z.shape, -1, dtype=np.intp)
+        tiles = np.repeat(rows, np.diff(adjacency.indptr))
+        self._neighbor[tiles, adjacency.side] = adjacency.neighbor
+        self.tile_set = tile_set
+    @staticmethod
+    def _side_values(alpha, beta, w):
+        return alpha*(abs(w)**2 + 1) - 2*(beta.conjugate()*w).real
+    def _search(self, z):
+        '''Return an array of the index of the first tile containing each
+        point of the complex array z or -1.
+        '''
+        found = np.full(len(z), -1, dtype=np.intp)
+        n_tiles, n_sides = self._alpha.shape
+        if not n_tiles:
+            return found
+        # _side_values plus the tolerance in real arithmetic
+        alpha, gamma = self._alpha, self._gamma + 2 * self.tolerance
+        beta_x, beta_y = 2 * self._beta.real, 2 * self._beta.imag
+        # Search the tiles for chunks of points at a time to bound memory
+        step = max(1, self.search_chunk // (n_tiles * n_sides))
+        for i in range(0, len(z), step):
+            w = z[i:i+step, None, None]
+            values = alpha * (abs(w)**2 + 1) + gamma
+            values -= beta_x * w.real
+            values -= beta_y * w.imag
+            inside = np.all(values >= 0, axis=2)
+            first = np.argmax(inside, axis=1)
+            found[i:i+step] = np.where(
+                    inside[np.arange(len(first)), first], first, -1)
+        return found
+    def locate(self, point, start=0):
+        '''Return the index of the tile containing point (a Point, (x, y)
+        tuple, or complex number) or -1 if no tile does.
+        '''
+        if isinstance(point, Point):
+            z = complex(point.x, point.y)
+        elif isinstance(point, complex):
+            z = point
+        else:
+            z = complex(*point)
+        return int(self.locate_array(np.array([z]), start)[0])
+    def locate_array(self, points, start=0):
+        '''Return an int array of the index of the tile containing each
+        point of a complex array or PointArray or -1 where no tile does.
+
+        start is the tile to start each walk from as an int or array.
+        '''
+        if isinstance(points, PointArray):
+            points = points.z
+        z = np.asarray(points, dtype=np.complex128)
+        tiles = np.broadcast_to(np.asarray(start, dtype=np.intp),
+                                z.shape).ravel().copy()
+        z = z.ravel()
+        tiles[abs(z) >= 1] = -1
+        active = np.flatnonzero(tiles >= 0)
+        lost = [active[:0]]
+        # A walk with more steps than there are tiles is stuck in a cycle
+        for _ in range(len(self.tile_set) + 1):
+            if not len(active):
+                break
+            cur = tiles[active]
+            values = self._side_values(self._alpha[cur], self._beta[cur],
+                                       z[active, None])
+            values += self._gamma[cur]
+            side = np.argmin(values, axis=1)
+            outside = (values[np.arange(len(cur)), side]
+                       < -2 * self.tolerance)
+            active = active[outside]
+            tiles[active] = self._neighbor[cur[outside], side[outside]]
+            # Walks that leave the tiling stop
+            left = tiles[active] < 0
+            lost.append(active[left])
+            active = active[~left]
+        else:
+            lost.append(active)
+        # A walk can leave a tiling that is not convex through a side far
+        # from the point so search all tiles
+        lost = np.concatenate(lost)
+        tiles[lost] = self._search(z[lost])
+        return tiles.reshape(np.shape(points))
@@ -0,0 +1,244 @@
+import os
+
+import numpy as np
+
+from ..poincare import PointArray, TransformStack
+from . import Tile
+
+
+class TileSet:
+    '''Columnar storage for many tiles.
+
+    Each tile is a row of numpy arrays instead of a Tile object with its own
+    Points, Edges, and Transform.  Tiles with fewer than max_sides sides are
+    padded with nan vertices and -1 side codes.  Side codes and decorators are
+    stored as indices into the codes and decorators lists.  gen_index and
+    parent are -1 when unknown (e.g. for the start tile).
+
+    Indexing with an integer returns a new Tile built from the stored row.
+    Slicing returns a TileSet of the rows without copying them.  Its parent
+    column still indexes into this TileSet.
+    '''
+    def __init__(self, capacity=16):
+        self._n = 0
+        self._vertices = np.full((capacity, 0, 2), np.nan)
+        self._mats = np.zeros((capacity, 2, 2), dtype=np.complex128)
+        self._conj = np.zeros(capacity, dtype=bool)
+        self._side_codes = np.full((capacity, 0), -1, dtype=np.int32)
+        self._n_sides = np.zeros(capacity, dtype=np.int32)
+        self._touching_side = np.full(capacity, -1, dtype=np.int32)
+        self._gen_index = np.full(capacity, -1, dtype=np.int32)
+        self._parent = np.full(capacity, -1, dtype=np.intp)
+        self._decorator = np.full(capacity, -1, dtype=np.int32)
+        self.codes = []
+        self.decorators = []
+        self._code_ids = {}
+    def __len__(self):
+        return self._n
+    def __iter__(self):
+        for i in range(self._n):
+            yield self[i]
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return self._slice(i)
+        if not isinstance(i, (int, np.integer)):
+            raise TypeError('TileSet indices must be integers or slices')
+        if i < 0:
+            i += self._n
+        if not 0 <= i < self._n:
+            raise IndexError('TileSet index out of range')
+        n_sides = self._n_sides[i]
+        vertices = PointArray(self._vertices[i, :n_sides]).to_list()
+        touching_side = self._touching_side[i]
+        decorator = self._decorator[i]
+        tile = Tile(vertices,
+                    touching_side=None if touching_side < 0
+                                  else int(touching_side),
+                    trans=self.transforms[i],
+                    decorator=None if decorator < 0
+                              else self.decorators[decorator])
+        tile.set_side_codes([None if c < 0 else self.codes[c]
+                             for c in self._side_codes[i, :n_sides]])
+        return tile
+    def _slice(self, i):
+        start, stop, step = i.indices(self._n)
+        if step != 1:
+            raise ValueError(f'Expected a slice with step 1. Got {step}.')
+        tile_set = TileSet(capacity=0)
+        for name in self._column_names:
+            setattr(tile_set, '_' + name,
+                    getattr(self, '_' + name)[start:max(start, stop)])
+        tile_set._n = len(tile_set._n_sides)
+        tile_set.codes = list(self.codes)
+        tile_set.decorators = list(self.decorators)
+        tile_set._code_ids = dict(self._code_ids)
+        return tile_set
+    def __repr__(self):
+        return '{}({})'.format(type(self).__name__, self._n)
+    def to_list(self):
+        '''Convert to a list of Tile objects.'''
+        return list(self)
+    @property
+    def max_sides(self):
+        return self._vertices.shape[1]
+    @property
+    def vertices(self):
+        '''An (N, max_sides, 2) float array of vertex coordinates.'''
+        return self._vertices[:self._n]
+    @property
+    def transforms(self):
+        return TransformStack(self._mats[:self._n], self._conj[:self._n])
+    @property
+    def side_codes(self):
+        '''An (N, max_sides) int array of indices into codes.'''
+        return self._side_codes[:self._n]
+    @property
+    def n_sides(self):
+        return self._n_sides[:self._n]
+    @property
+    def touching_side(self):
+        return self._touching_side[:self._n]
+    @property
+    def gen_index(self):
+        return self._gen_index[:self._n]
+    @property
+    def parent(self):
+        return self._parent[:self._n]
+    @property
+    def decorator_index(self):
+        return self._decorator[:self._n]
+    @property
+    def nbytes(self):
+        '''The number of bytes allocated for the columns, including unused
+        capacity.
+        '''
+        return sum(getattr(self, '_' + name).nbytes
+                   for name in self._column_names)
+    def _grow(self, n, max_sides):
+        capacity = len(self._mats)
+        if n > capacity:
+            capacity = max(n, 2*capacity)
+        sides = max(max_sides, self.max_sides)
+        if capacity == len(self._mats) and sides == self.max_sides:
+            return
+        def resized(arr, shape, fill):
+            new = np.full(shape, fill, dtype=arr.dtype)
+            new[tuple(slice(0, s) for s in arr.shape)] = arr
+            return new
+        self._vertices = resized(self._vertices, (capacity, sides, 2), np.nan)
+        self._side_codes = resized(self._side_codes, (capacity, sides), -1)
+        self._mats = resized(self._mats, (capacity, 2, 2), 0)
+        self._conj = resized(self._conj, (capacity,), False)
+        self._n_sides = resized(self._n_sides, (capacity,), 0)
+        self._touching_side = resized(self._touching_side, (capacity,), -1)
+        self._gen_index = resized(self._gen_index, (capacity,), -1)
+        self._parent = resized(self._parent, (capacity,), -1)
+        self._decorator = resized(self._decorator, (capacity,), -1)
+    def _code_id(self, code):
+        if code is None:
+            return -1
+        try:
+            i = self._code_ids.get(code)
+        except TypeError:
+            # Unhashable codes like lists are found by equality
+            for i, other in enumerate(self.codes):
+                if other == code:
+                    return i
+            self.codes.append(code)
+            return len(self.codes) - 1
+        if i is None:
+            i = self._code_ids[code] = len(self.codes)
+            self.codes.append(code)
+        return i
+    def _decorator_id(self, decorator):
+        if decorator is None:
+            return -1
+        for i, other in enumerate(self.decorators):
+            if other is decorator:
+                return i
+        self.decorators.append(decorator)
+        return len(self.decorators) - 1
+    def append(self, tile, parent=-1, gen_index=-1):
+        '''Add a copy of tile and return its index.'''
+        i = self._n
+        p = len(tile.vertices)
+        self._grow(i + 1, p)
+        self._vertices[i, :p] = [(v.x, v.y) for v in tile.vertices]
+        self._side_codes[i, :p] = [self._code_id(side.code)
+                                   for side in tile.sides]
+        self._mats[i] = np.reshape(tile.trans.abcd, (2, 2))
+        self._conj[i] = tile.trans.conj
+        self._n_sides[i] = p
+        self._touching_side[i] = (-1 if tile.touching_side is None
+                                  else tile.touching_side)
+        self._gen_index[i] = gen_index
+        self._parent[i] = parent
+        self._decorator[i] = self._decorator_id(tile.decorator)
+        self._n += 1
+        return i
+    def extend(self, tiles):
+        for tile in tiles:
+            self.append(tile)
+    def save(self, directory):
+        '''Save the columns and codes as .npy files in a new directory.
+
+        Decorators are not saved.
+        '''
+        os.makedirs(directory)
+        for name, col in self._columns().items():
+            np.save(os.path.join(directory, name + '.npy'), col)
+        codes = np.empty(len(self.codes), dtype=object)
+        codes[:] = self.codes
+        np.save(os.path.join(directory, 'codes.npy'), codes)
+    @classmethod
+    def load(cls, directory, decorators=(), mmap_mode=None):
+        '''Load a TileSet saved with save.
+
+        With mmap_mode='r' (see numpy.load), the columns are memory-mapped
+        instead of read into memory.  decorators replaces the decorators
+        list.
+        '''
+        tile_set = cls(capacity=0)
+        for name in cls._column_names:
+            setattr(tile_set, '_' + name, np.load(
+                    os.path.join(directory, name + '.npy'),
+                    mmap_mode=mmap_mode))
+        tile_set._n = len(tile_set._n_sides)
+        tile_set.codes = list(np.load(os.path.join(directory, 'codes.npy'),
+                                      allow_pickle=True))
+        for i, code in enumerate(tile_set.codes):
+            try:
+                tile_set._code_ids[code] = i
+            except TypeError:
+                pass
+        tile_set.decorators = list(decorators)
+        return tile_set
+    _column_names = ('vertices', 'mats', 'conj', 'side_codes', 'n_sides',
+                     'touching_side', 'gen_index', 'parent', 'decorator')
+    def _columns(self):
+        '''Return a dict of the used rows of every column.'''
+        return {name: getattr(self, '_' + name)[:self._n]
+                for name in self._column_names}
+    def _extend_columns(self, columns, codes=None, decorators=None):
+        '''Append rows given as a dict of columns like _columns returns.
+
+        If codes and decorators are given, the side code and decorator
+        columns index into them instead of into this TileSet's lists.
+        '''
+        columns = dict(columns)
+        if codes is not None:
+            code_map = np.array([self._code_id(c) for c in codes] + [-1],
+                                dtype=np.int32)
+            columns['side_codes'] = code_map[columns['side_codes']]
+        if decorators is not None:
+            decorator_map = np.array(
+                    [self._decorator_id(d) for d in decorators] + [-1],
+                    dtype=np.int32)
+            columns['decorator'] = decorator_map[columns['decorator']]
+        i, n = self._n, len(columns['n_sides'])
+        self._grow(i + n, columns['vertices'].shape[1])
+        for name in self._column_names:
+            col = columns[name]
+            getattr(self, '_' + name)[(slice(i, i+n),) + tuple(
+                    slice(0, s) for s in col.shape[1:])] = col
+        self._n += n
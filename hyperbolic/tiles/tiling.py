@@ -0,0 +1,83 @@
+import time
+
+
+class Tiling:
+    '''Tiles placed by a TileLayout that can be extended by more rings.
+
+    tiles is a list, or the TileSet given as out, of the tiles placed so far
+    in the order of TileLayout.tile_plane.  Between calls to extend only the
+    unmatched edges around the tiling are kept, so each call only pays for
+    the new tiles.  min_size, viewport, and transform are as for tile_plane.
+    '''
+    def __init__(self, layout, start_tile, out=None, min_size=None,
+                 viewport=None, transform=None):
+        self.layout = layout
+        self.tiles = [] if out is None else out
+        self.min_size = min_size
+        self.transform = transform
+        self._base = len(self.tiles)
+        self._frontier, self._visible, self._toward = layout._start_frontier(
+                start_tile, viewport, transform)
+        # The generator of the ring being placed when extend stopped early
+        self._ring = None
+        # The start tile is counted if it is visible
+        if self._frontier.count:
+            self._add(start_tile, -1, -1)
+    def __len__(self):
+        return len(self.tiles) - self._base
+    def __repr__(self):
+        return '{}({} tiles, depth {})'.format(
+                type(self).__name__, len(self), self.depth)
+    @property
+    def depth(self):
+        '''The number of complete rings around the start tile.'''
+        return self._frontier.ring - (self._ring is not None)
+    @property
+    def finished(self):
+        '''True if no tiles are left to place (e.g. all are below min_size).
+        '''
+        return self._ring is None and not self._frontier.boundary
+    def _add(self, tile, parent, gen_index):
+        if isinstance(self.tiles, list):
+            self.tiles.append(tile)
+        else:
+            self.tiles.append(tile, gen_index=gen_index,
+                              parent=parent if parent < 0
+                                     else self._base + parent)
+    def extend(self, rings=1, max_tiles=None, max_bytes=None,
+               max_seconds=None):
+        '''Place up to rings more rings of tiles and return the number of
+        tiles added.
+
+        Stops early, possibly partway through a ring, once max_tiles tiles
+        have been added, the TileSet of tiles uses more than max_bytes (see
+        TileSet.nbytes), or max_seconds have passed.  The next call
+        continues where this one stopped and finishing that ring counts as
+        one of its rings.  rings=None places rings until a budget is reached
+        or the tiling is finished.
+        '''
+        if max_bytes is not None and isinstance(self.tiles, list):
+            raise ValueError('max_bytes requires tiles to be in a TileSet')
+        if max_seconds is not None:
+            deadline = time.perf_counter() + max_seconds
+        frontier = self._frontier
+        target = None if rings is None else self.depth + rings
+        added = 0
+        while True:
+            if self._ring is None:
+                if not frontier.boundary or (
+                        target is not None and frontier.ring >= target):
+                    return added
+                self._ring = self.layout._expand_ring(
+                        frontier, self._visible, self._toward, self.min_size,
+                        self.transform)
+            for tile, _, parent, gen_index in self._ring:
+                self._add(tile, parent, gen_index)
+                added += 1
+                if ((max_tiles is not None and added >= max_tiles)
+                        or (max_bytes is not None
+                            and self.tiles.nbytes > max_bytes)
+                        or (max_seconds is not None
+                            and time.perf_counter() >= deadline)):
+                    return added
+            self._ring = None
@@ -0,0 +1,168 @@
+import io
+import math
+import re
+from xml.etree import ElementTree
+
+import drawsvg as draw
+import numpy as np
+import pytest
+
+from hyperbolic.poincare import Point, Polygon
+from hyperbolic.svg_writer import SvgWriter
+from hyperbolic.tiles import (
+    TileDecoratorNumbered, TileDecoratorOffset, TileDecoratorPolygons,
+    TileGen, TileLayout, TileSet,
+)
+
+
+def make_tiles(out=None):
+    layout = TileLayout()
+    layout.add_generator(TileGen.make_regular(5, q=4), (0,)*5)
+    tiles = layout.tile_plane(layout.default_start_tile(), 2, out=out)
+    decorators = [
+        TileDecoratorOffset(0.03),
+        TileDecoratorPolygons(Polygon.from_vertices([
+                Point.from_h_polar(0.4, 10), Point.from_h_polar(0.2, 100),
+                Point.from_h_polar(0.5, 250)])),
+        None,
+        TileDecoratorNumbered(0.1),
+    ]
+    tile_list = tiles if out is None else TileSet()
+    for i, tile in enumerate(tiles):
+        tile.decorator = decorators[i // 5 % len(decorators)]
+        if out is not None:
+            tile_list.append(tile)
+    return tile_list
+
+
+def svg_elements(svg):
+    return [line for line in svg.splitlines()
+            if line.startswith(('<path', '<text'))]
+
+
+def check_elements(expected, found):
+    # Outlines drawn in bulk are placed by transforms so their coordinates
+    # can differ from drawsvg's in the last digits
+    number = r'-?\d+(?:\.\d*)?(?:e-?\d+)?'
+    def parts(line):
+        return (re.sub(number, '#', line),
+                np.array([float(x) for x in re.findall(number, line)]))
+    if len(found) != len(expected):
+        raise ValueError(f'Expected {expected}. Got {found}.')
+    for line1, line2 in zip(expected, found):
+        (text1, nums1), (text2, nums2) = parts(line1), parts(line2)
+        if text1 != text2 or not np.allclose(nums1, nums2, atol=1e-7):
+            raise ValueError(f'Expected {line1}. Got {line2}.')
+
+
+@pytest.mark.parametrize('out', [None, TileSet])
+@pytest.mark.parametrize('kwargs', [{}, {'hwidth': 0.02}])
+def test_draw_tiles_matches_drawsvg(out, kwargs):
+    d = draw.Drawing(2, 2, origin='center')
+    for tile in make_tiles():
+        d.draw(tile, fill='red', stroke_width=0.01, **kwargs)
+    f = io.StringIO()
+    with SvgWriter(f, 2, 2, origin='center') as writer:
+        writer.draw_tiles(make_tiles(out and out()), batch_size=3,
+                          fill='red', stroke_width=0.01, **kwargs)
+    svg = f.getvalue()
+    if svg.splitlines()[:3] != d.as_svg().splitlines()[:3]:
+        raise ValueError(f'Expected the drawsvg header. Got {svg[:200]}.')
+    if not svg.endswith('</svg>\n'):
+        raise ValueError(f'Expected a closed document. Got {svg[-50:]}.')
+    check_elements(svg_elements(d.as_svg()), svg_elements(svg))
+
+
+def test_draw_shapes(tmp_path):
+    poly = Polygon.from_vertices([Point.from_h_polar(0.5, math.pi/2*i)
+                                  for i in range(4)])
+    path = tmp_path / 'poly.svg'
+    with SvgWriter(path, 2, 2, origin='center') as writer:
+        writer.draw_shapes(*poly.edges, close=True, fill='red')
+        writer.draw(poly, fill='blue')
+    expected = [poly.to_drawables(fill=fill)[0] for fill in ('red', 'blue')]
+    d = draw.Drawing(2, 2, origin='center')
+    d.extend(expected)
+    found = svg_elements(path.read_text())
+    if found != svg_elements(d.as_svg()):
+        raise ValueError(f'Expected {svg_elements(d.as_svg())}. Got {found}.')
+
+
+def test_path_error_leaves_valid_document():
+    f = io.StringIO()
+    with SvgWriter(f, 2, 2, origin='center') as writer:
+        with pytest.raises(KeyError):
+            with writer.path(fill='red') as path:
+                path.M(0, 0).L(0.5, 0)
+                raise KeyError()
+        writer.write_path('M0,0 L0,0.5', fill='red')
+    root = ElementTree.fromstring(f.getvalue())
+    paths = root.findall('{http://www.w3.org/2000/svg}path')
+    if [path.get('d') for path in paths] != ['M0,0 L0.5,0', 'M0,0 L0,0.5']:
+        raise ValueError(f'Expected two closed paths. Got {f.getvalue()}.')
+
+
+def path_points(svg):
+    '''Return the command kinds and absolute end points of the paths of
+    svg.'''
+    kinds, points = [], []
+    for d in re.findall(' d="([^"]*)"', svg):
+        x = y = 0
+        for cmd, arg_str in re.findall(
+                '([MmLlHhVvAaZz])([^MmLlHhVvAaZz]*)', d):
+            args = [float(a) for a in re.findall(
+                    r'-?(?:\d+\.?\d*|\.\d+)(?:e-?\d+)?', arg_str)]
+            upper = cmd.upper()
+            n = {'M': 2, 'L': 2, 'H': 1, 'V': 1, 'A': 7, 'Z': 0}[upper]
+            if n == 0:
+                x, y = start
+                kinds.append('Z')
+                continue
+            for i in range(0, len(args), n):
+                a = args[i:i+n]
+                dx, dy = (x, y) if cmd != upper else (0, 0)
+                if upper == 'H':
+                    x = a[0] + dx
+                elif upper == 'V':
+                    y = a[0] + dy
+                else:
+                    x, y = a[-2] + dx, a[-1] + dy
+                kinds.append('A' if upper == 'A' else 'L')
+                points.append((x, y))
+                if upper == 'M':
+                    start = (x, y)
+                    kinds[-1] = 'M'
+                    upper, cmd = 'L', 'L' if cmd == 'M' else 'l'
+    return kinds, np.array(points)
+
+
+@pytest.mark.parametrize('precision', [None, 4])
+@pytest.mark.parametrize('relative', [False, True])
+def test_compact_output(precision, relative):
+    def write(**options):
+        f = io.StringIO()
+        with SvgWriter(f, 2, 2, origin='center', **options) as writer:
+            writer.draw_tiles(make_tiles(), fill='red', stroke_width=0.01)
+            writer.draw(Polygon.from_vertices(
+                    [Point.from_h_polar(0.5, math.pi/2*i) for i in range(4)]),
+                    fill='blue')
+        return f.getvalue()
+    full = write()
+    compact = write(precision=precision, relative=relative,
+                    share_styles=True, merge_paths=True)
+    if len(compact) >= len(full):
+        raise ValueError(f'Expected smaller output. Got {len(compact)} '
+                         f'characters instead of {len(full)}.')
+    (kinds1, points1), (kinds2, points2) = path_points(full), path_points(
+            compact)
+    tol = 1e-9 if precision is None else 10**-precision
+    if kinds1 != kinds2 or not np.allclose(points1, points2, rtol=0,
+                                           atol=tol):
+        raise ValueError(f'Expected the points of {full}. Got {compact}.')
+    if compact.count('<path') >= full.count('<path') / 2:
+        raise ValueError(f'Expected merged paths. Got {compact}.')
+    if ('<style>.s0{fill:red;stroke-width:0.01}.s1{fill:blue}</style>'
+            not in compact or any('fill="' in line
+                                  for line in svg_elements(compact)
+                                  if line.startswith('<path'))):
+        raise ValueError(f'Expected styles as classes. Got {compact}.')
@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+
+from hyperbolic.poincare import (
+    PointArray,
+    distance_matrix,
+    nearest_neighbors,
+)
+
+
+def random_points(n, seed=0):
+    rng = np.random.default_rng(seed)
+    r = np.sqrt(rng.uniform(0, 0.95, n))
+    return PointArray(r * np.exp(2j*np.pi*rng.uniform(size=n)))
+
+
+def test_matches_point_distance():
+    arr = random_points(12)
+    pts = arr.to_list()
+    result = distance_matrix(arr)
+    expected = [[p1.distance_to(p2) if i != j else 0
+                 for j, p2 in enumerate(pts)] for i, p1 in enumerate(pts)]
+    if not np.allclose(result, expected):
+        raise ValueError(f'Expected {expected}. Got {result}.')
+
+
+@pytest.mark.parametrize('chunk_size, workers', [(7, None), (50, 3), (None, 2)])
+def test_chunked_condensed(chunk_size, workers):
+    arr = random_points(40)
+    full = distance_matrix(arr)
+    result = distance_matrix(arr, condensed=True, chunk_size=chunk_size,
+                             workers=workers)
+    expected = full[np.triu_indices(len(arr), k=1)]
+    if not np.allclose(result, expected):
+        raise ValueError(f'Expected {expected}. Got {result}.')
+
+
+def test_memory_mapped_output(tmp_path):
+    arr1, arr2 = random_points(20, seed=1), random_points(30, seed=2)
+    result = distance_matrix(arr1, arr2, filename=tmp_path / 'dist.dat',
+                             chunk_size=64)
+    if not isinstance(result, np.memmap):
+        raise TypeError(f'Expected np.memmap. Got {type(result)}.')
+    expected = distance_matrix(arr1, arr2)
+    if not np.allclose(result, expected):
+        raise ValueError(f'Expected {expected}. Got {result}.')
+
+
+@pytest.mark.parametrize('k, chunk_size', [(1, None), (4, 9), (5, 100)])
+def test_nearest_neighbors(k, chunk_size):
+    arr = random_points(60)
+    full = distance_matrix(arr)
+    np.fill_diagonal(full, np.inf)
+    indices, distances = nearest_neighbors(arr, k=k, chunk_size=chunk_size,
+                                           workers=2)
+    expected = np.sort(full, axis=1)[:, :k]
+    if not np.allclose(distances, expected):
+        raise ValueError(f'Expected {expected}. Got {distances}.')
+    found = np.take_along_axis(full, indices, axis=1)
+    if not np.allclose(found, expected):
+        raise ValueError(f'Indices do not match distances: {indices}.')
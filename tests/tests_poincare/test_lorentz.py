@@ -0,0 +1,65 @@
+import math
+
+import numpy as np
+import pytest
+
+from hyperbolic.poincare import Point, PointArray, Transform, lorentz
+
+
+POINTS = [Point(0.1, 0.2), Point(-0.5, 0.3), Point(0.0, -0.9), Point(0.7, 0.1)]
+
+
+def test_disk_round_trip():
+    arr = PointArray.from_points(POINTS)
+    result = lorentz.to_disk(lorentz.from_disk(arr))
+    if not np.allclose(result, arr.z):
+        raise ValueError(f'Expected {arr.z}. Got {result}.')
+
+
+def test_distance_matches_point():
+    hyp = lorentz.from_disk(PointArray.from_points(POINTS))
+    result = lorentz.pairwise_distance(hyp)
+    expected = [[p1.distance_to(p2) if p1 != p2 else 0 for p2 in POINTS]
+                for p1 in POINTS]
+    if not np.allclose(result, expected):
+        raise ValueError(f'Expected {expected}. Got {result}.')
+
+
+def test_distance_far_from_origin():
+    hyp = lorentz.from_h_polar([60, 60, 61], [0, 1e-20, 0])
+    result = lorentz.pairwise_distance(hyp)
+    expected_near = 2 * math.asinh(math.sinh(60) * 1e-20 / 2)
+    if not (math.isclose(result[0, 1], expected_near)
+            and math.isclose(result[0, 2], 1)
+            and result[0, 0] == 0):
+        raise ValueError(f'Got {result}.')
+
+
+def test_midpoint_matches_point():
+    hyp = lorentz.from_disk(PointArray.from_points(POINTS[:2]))
+    result = lorentz.to_disk(lorentz.midpoint(hyp[0], hyp[1], frac=0.3))
+    expected = POINTS[0].midpoint_with(POINTS[1], frac=0.3)
+    if not np.isclose(result, complex(*expected)):
+        raise ValueError(f'Expected {expected}. Got {result}.')
+
+
+@pytest.mark.parametrize(
+    'trans',
+    [
+        Transform.rotation(deg=25),
+        Transform.translation((0.3, 0.5), (0.1, 0.1)),
+        Transform.mirror((0.1, 0.2), (0.5, -0.2)),
+    ]
+)
+def test_transform_matrix(trans):
+    arr = PointArray.from_points(POINTS)
+    mat = lorentz.transform_matrix(trans)
+    result = lorentz.to_disk(lorentz.apply_matrix(mat, lorentz.from_disk(arr)))
+    expected = trans.apply_to_array(arr.z)
+    if not np.allclose(result, expected):
+        raise ValueError(f'Expected {expected}. Got {result}.')
+
+
+def test_transform_matrix_requires_isometry():
+    with pytest.raises(ValueError):
+        lorentz.transform_matrix(Transform.disk_to_half())
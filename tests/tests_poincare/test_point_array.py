@@ -0,0 +1,64 @@
+import math
+
+import numpy as np
+import pytest
+
+from hyperbolic.poincare import Point, Ideal, PointArray
+
+
+@pytest.mark.parametrize(
+    'hr, deg',
+    [
+        (0.5, 30),
+        (3.0, -120),
+        (8.0, 200),
+    ]
+)
+def test_from_h_polar_matches_point(hr, deg):
+    arr = PointArray.from_h_polar([hr], deg=[deg])
+    pt = Point.from_h_polar(hr, deg=deg)
+    if not (arr[0] == pt):
+        raise ValueError(f'Expected {pt}. Got {arr[0]}.')
+    if not math.isclose(arr.hr[0], pt.hr):
+        raise ValueError(f'Expected hr {pt.hr}. Got {arr.hr[0]}.')
+
+
+def test_lazy_polar_matches_point():
+    xy = np.array([[0.1, 0.2], [-0.5, 0.3], [0.0, -0.9]])
+    arr = PointArray(xy)
+    for i, (x, y) in enumerate(xy):
+        pt = Point(x, y)
+        if not (math.isclose(arr.hr[i], pt.hr)
+                and math.isclose(arr.theta[i], pt.theta)):
+            raise ValueError(f'Expected {pt.hr, pt.theta}. '
+                             f'Got {arr.hr[i], arr.theta[i]}.')
+
+
+def test_ideal_points():
+    arr = PointArray.from_polar_euclid([0.5, 1.0], deg=[0, 90])
+    mask = arr.is_ideal()
+    if mask.tolist() != [False, True]:
+        raise ValueError(f'Expected [False, True]. Got {mask.tolist()}.')
+    if not np.isinf(arr.hr[1]):
+        raise ValueError(f'Expected infinite hr. Got {arr.hr[1]}.')
+    if not isinstance(arr[1], Ideal):
+        raise TypeError(f'Expected instance of Ideal. Got {type(arr[1])}.')
+
+
+def test_xy_view_shares_memory():
+    arr = PointArray.from_points([Point(0.1, 0.2), (0.3, -0.4)])
+    xy = arr.xy
+    if xy.shape != (2, 2) or not np.shares_memory(xy, arr.z):
+        raise ValueError('Expected an (N, 2) view of the complex storage.')
+
+
+def test_slice_returns_point_array():
+    arr = PointArray.from_h_polar(np.linspace(0, 2, 5), theta=0)
+    sub = arr[1:3]
+    if not isinstance(sub, PointArray) or len(sub) != 2:
+        raise TypeError(f'Expected PointArray of length 2. Got {sub!r}.')
+
+
+def test_outside_unit_circle():
+    with pytest.raises(ValueError):
+        PointArray.from_euclid([0.5, 1.5], [0, 0])
@@ -0,0 +1,159 @@
+import math
+
+import numpy as np
+import pytest
+
+from hyperbolic.euclid import Arc, Circle, Line
+from hyperbolic.poincare import Point, PointArray, Transform
+
+
+TRANSFORMS = [
+    Transform.identity(),
+    Transform.rotation(deg=40),
+    Transform.translation((0.3, -0.2)),
+    Transform.shift_origin((0.5, 0.1), (0.2, 0.6)),
+    Transform.mirror((0.1, 0.4), (-0.3, 0.2)),
+    Transform.disk_to_half(),
+]
+
+
+def random_points(n=50, seed=0):
+    rng = np.random.default_rng(seed)
+    r = np.sqrt(rng.uniform(0, 0.98, n))
+    return r * np.exp(2j*np.pi*rng.uniform(size=n))
+
+
+@pytest.mark.parametrize('trans', TRANSFORMS)
+def test_apply_to_array_matches_tuple(trans):
+    z = random_points()
+    result = trans.apply_to_array(z)
+    expected = np.array([complex(*trans.apply_to_tuple((p.real, p.imag)))
+                         for p in z])
+    if not np.allclose(result, expected):
+        raise ValueError(f'Expected {expected}. Got {result}.')
+
+
+def test_apply_to_array_pole():
+    trans = Transform.disk_to_half()
+    z = np.array([-1j, 0.5])
+    result = trans.apply_to_array(z)
+    expected = complex(*trans.apply_to_tuple((0, -1)))
+    if result[0] != expected:
+        raise ValueError(f'Expected {expected}. Got {result[0]}.')
+
+
+def test_apply_to_array_out():
+    trans = Transform.translation((0.3, -0.2))
+    z = random_points()
+    expected = trans.apply_to_array(z)
+    out = trans.apply_to_array(z, out=z)
+    if out is not z or not np.allclose(z, expected):
+        raise ValueError('Expected the result to be written in place.')
+
+
+def test_apply_to_point_array():
+    trans = Transform.rotation(deg=90)
+    arr = PointArray.from_points([Point(0.5, 0)])
+    result = trans.apply_to_list(arr)
+    if not isinstance(result, PointArray) or not (result[0] == Point(0, 0.5)):
+        raise ValueError(f'Expected PointArray with Point(0, 0.5). '
+                         f'Got {result!r}.')
+
+
+@pytest.mark.parametrize('trans', TRANSFORMS)
+def test_normalized_same_action(trans):
+    norm = trans.normalized()
+    z = random_points()
+    if not np.allclose(norm.apply_to_array(z), trans.apply_to_array(z)):
+        raise ValueError(f'Expected {trans} and {norm} to be equivalent.')
+    a, b, c, d = norm.abcd
+    if abs(a*d - b*c - 1) > 1e-12:
+        raise ValueError(f'Expected unit determinant. Got {a*d - b*c}.')
+
+
+def test_deep_composition_stays_normalized():
+    p = (0.4, 0.3)
+    rot = Transform.merge(Transform.shift_origin(p),
+                          Transform.rotation(deg=360/7*3),
+                          Transform.translation(p))
+    drifts = []
+    old_hook = Transform.drift_hook
+    Transform.drift_hook = lambda trans, drift: drifts.append(drift)
+    try:
+        acc = Transform.identity()
+        for _ in range(7000):
+            acc = Transform.merge(acc, rot, normalize=True)
+    finally:
+        Transform.drift_hook = old_hook
+    # 7000 steps is 3000 full turns so acc should be the identity
+    z = random_points()
+    if not np.allclose(acc.apply_to_array(z), z):
+        raise ValueError(f'Expected the identity. Got {acc}.')
+    if len(drifts) != 7000 or max(drifts) > 1e-12:
+        raise ValueError(f'Expected small drift. Got {max(drifts)}.')
+
+
+def shape_points(shape, n=5):
+    '''Return n points along an Arc or Line from start to end or around a
+    Circle in its direction.'''
+    if isinstance(shape, Line):
+        return [(shape.x1 + (shape.x2-shape.x1)*t,
+                 shape.y1 + (shape.y2-shape.y1)*t)
+                for t in np.linspace(0, 1, n)]
+    if isinstance(shape, Arc):
+        start = math.radians(shape.start_deg)
+        span = (math.radians(shape.end_deg) - start) % (2*math.pi)
+        if not shape.cw:
+            span -= 2*math.pi
+    else:
+        start, span = 0, 2*math.pi if shape.cw else -2*math.pi
+    return [(shape.cx + shape.r*math.cos(start + span*t),
+             shape.cy + shape.r*math.sin(start + span*t))
+            for t in np.linspace(0, 1, n)]
+
+
+@pytest.mark.parametrize('trans', TRANSFORMS + [Transform.half_to_disk()])
+@pytest.mark.parametrize('shape', [
+    Circle(0.2, -0.1, 0.4), Circle(0.1, 0.3, 0.2, cw=False),
+    Arc(0.3, 0.2, 0.5, 30, 200), Arc(-0.2, 0.1, 0.3, -40, 100, cw=False),
+    Line(-0.5, 0.2, 0.4, 0.1), Line(0.5, -0.5, -0.5, 0.5),
+])
+def test_apply_to_shape_maps_points(trans, shape):
+    out = trans.apply_to_shape(shape)
+    points = trans.apply_to_list(shape_points(shape, n=32))
+    if isinstance(out, Line):
+        ends = [out.start_point(), out.end_point()]
+        dx, dy = out.x2 - out.x1, out.y2 - out.y1
+        for x, y in points:
+            along = ((x - out.x1)*dx + (y - out.y1)*dy) / out.length()**2
+            across = ((y - out.y1)*dx - (x - out.x1)*dy) / out.length()
+            if not (-1e-9 <= along <= 1 + 1e-9 and abs(across) <= 1e-9):
+                raise ValueError(f'Expected {(x, y)} on {out}.')
+    else:
+        angles = [math.atan2(y - out.cy, x - out.cx) for x, y in points]
+        steps = [(a2 - a1) % (2*math.pi) for a1, a2 in zip(angles, angles[1:])]
+        if not all((step < math.pi) == out.cw for step in steps):
+            raise ValueError(f'Expected the direction of {points}. Got {out}.')
+        for x, y in points:
+            if not math.isclose(math.hypot(x - out.cx, y - out.cy), out.r):
+                raise ValueError(f'Expected {(x, y)} on {out}.')
+        ends = [points[0], points[-1]]
+        if isinstance(out, Arc):
+            ends = [out.start_point(), out.end_point()]
+    if not np.allclose(ends, [points[0], points[-1]]):
+        raise ValueError(f'Expected ends {points[0]}, {points[-1]}. '
+                         f'Got {out}.')
+
+
+def test_apply_to_gcircle_arrays():
+    a = np.array([1, -1, 0])
+    b = np.array([-0.2+0.1j, 0.3j, 1-1j])
+    d = np.array([-0.2, 0.5, 0.3])
+    for trans in TRANSFORMS:
+        a2, b2, d2 = trans.apply_to_gcircle(a, b, d)
+        for i in range(3):
+            expected = trans.apply_to_gcircle(float(a[i]), complex(b[i]),
+                                              float(d[i]))
+            if not np.allclose((a2[i], b2[i], d2[i]), expected):
+                raise ValueError(f'Expected {expected}. '
+                                 f'Got {(a2[i], b2[i], d2[i])}.')
@@ -0,0 +1,95 @@
+import numpy as np
+import pytest
+
+from hyperbolic.poincare import Transform, TransformStack
+
+
+TRANSFORMS = [
+    Transform.rotation(deg=40),
+    Transform.translation((0.3, -0.2)),
+    Transform.shift_origin((0.5, 0.1), (0.2, 0.6)),
+    Transform.mirror((0.1, 0.4), (-0.3, 0.2)),
+    Transform.mirror((0.2, -0.7)),
+]
+POINTS = np.array([0, 0.3+0.1j, -0.5j, 0.2-0.6j, -0.8+0.1j])
+
+
+def assert_same_action(stack, transforms):
+    result = stack.apply_to_array(POINTS, all_pairs=True)
+    expected = np.array([[complex(*t.apply_to_tuple((z.real, z.imag)))
+                          for z in POINTS] for t in transforms])
+    if not np.allclose(result, expected):
+        raise ValueError(f'Expected {expected}. Got {result}.')
+
+
+def test_round_trip():
+    stack = TransformStack.from_transforms(TRANSFORMS)
+    assert_same_action(stack, stack.to_list())
+    assert_same_action(stack, TRANSFORMS)
+
+
+@pytest.mark.parametrize('other', TRANSFORMS)
+def test_merge_matches_transform_merge(other):
+    stack = TransformStack.from_transforms(TRANSFORMS)
+    merged = TransformStack.merge(stack, other)
+    assert_same_action(merged, [Transform.merge(t, other) for t in TRANSFORMS])
+    merged = TransformStack.merge(other, stack)
+    assert_same_action(merged, [Transform.merge(other, t) for t in TRANSFORMS])
+
+
+def test_inverted_and_conjugate():
+    stack = TransformStack.from_transforms(TRANSFORMS)
+    assert_same_action(stack.inverted(), [t.inverted() for t in TRANSFORMS])
+    assert_same_action(stack.conjugate(), [t.conjugate() for t in TRANSFORMS])
+    identity = TransformStack.merge(stack, stack.inverted())
+    assert_same_action(identity, [Transform.identity()] * len(TRANSFORMS))
+
+
+def test_merge_drift_hook():
+    calls, transform_calls = [], []
+    old_hooks = TransformStack.drift_hook, Transform.drift_hook
+    TransformStack.drift_hook = lambda stack, drift: calls.append(
+            (stack, drift))
+    Transform.drift_hook = lambda trans, drift: transform_calls.append(drift)
+    try:
+        stack = TransformStack.from_transforms(TRANSFORMS)
+        merged = TransformStack.merge(stack, stack.inverted())
+    finally:
+        TransformStack.drift_hook, Transform.drift_hook = old_hooks
+    if transform_calls or len(calls) != 1 or calls[0][0] is not merged:
+        raise ValueError(f'Expected one call with the merged stack. '
+                         f'Got {calls} and {transform_calls}.')
+    drift = calls[0][1]
+    if drift.shape != (len(TRANSFORMS),) or not np.all(drift < 1e-12):
+        raise ValueError(f'Expected the drift of each transform. Got {drift}.')
+
+
+def test_one_to_one():
+    stack = TransformStack.from_transforms(TRANSFORMS)
+    result = stack.apply_to_array(POINTS)
+    expected = np.array([complex(*t.apply_to_tuple((z.real, z.imag)))
+                         for t, z in zip(TRANSFORMS, POINTS)])
+    if not np.allclose(result, expected):
+        raise ValueError(f'Expected {expected}. Got {result}.')
+
+
+def test_normalized_matches_transform():
+    stack = TransformStack.from_transforms(TRANSFORMS).normalized()
+    expected = [t.normalized() for t in TRANSFORMS]
+    result = stack.mats.reshape(-1, 4)
+    if not np.allclose(result, [t.abcd for t in expected]):
+        raise ValueError(f'Expected {expected}. Got {stack.to_list()}.')
+    if not np.all(stack.drift() < 1e-12):
+        raise ValueError(f'Expected no drift. Got {stack.drift()}.')
+
+
+def test_apply_to_gcircle_matches_transform():
+    stack = TransformStack.from_transforms(TRANSFORMS)
+    a = np.array([1, -1, 0])
+    b = np.array([-0.2+0.1j, 0.3j, 1-1j])
+    d = np.array([-0.2, 0.5, 0.3])
+    result = np.array(stack.apply_to_gcircle(a, b, d, all_pairs=True))
+    expected = np.array([trans.apply_to_gcircle(a, b, d)
+                         for trans in TRANSFORMS]).transpose(1, 0, 2)
+    if not np.allclose(result, expected):
+        raise ValueError(f'Expected {expected}. Got {result}.')
@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+
+from hyperbolic.poincare import (
+    PointArray,
+    VPTree,
+    distance_matrix,
+    nearest_neighbors,
+)
+
+
+def random_points(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return PointArray.from_h_polar(rng.uniform(0, 6, n),
+                                   rng.uniform(0, 2*np.pi, n))
+
+
+@pytest.mark.parametrize('k', [1, 3, 8])
+def test_query_matches_brute_force(k):
+    points = random_points(500)
+    queries = random_points(20, seed=1)
+    tree = VPTree(points, leaf_size=8)
+    indices, distances = tree.query(queries, k=k)
+    expected_idx, expected = nearest_neighbors(queries, points, k=k)
+    if not np.allclose(distances, expected):
+        raise ValueError(f'Expected {expected}. Got {distances}.')
+    # The random points have no ties so the order is the same
+    np.testing.assert_array_equal(indices, expected_idx)
+
+
+def test_insert_without_rebuild():
+    points = random_points(300)
+    tree = VPTree(points[:100], leaf_size=4)
+    for p in points[100:]:
+        tree.insert(p)
+    tree.extend(random_points(50, seed=2))
+    all_points = np.concatenate((points.z, random_points(50, seed=2).z))
+    queries = random_points(10, seed=3)
+    indices, distances = tree.query(queries, k=2)
+    expected_idx, expected = nearest_neighbors(queries, all_points, k=2)
+    if len(tree) != 350 or not np.allclose(distances, expected):
+        raise ValueError(f'Expected {expected}. Got {distances}.')
+    np.testing.assert_array_equal(indices, expected_idx)
+
+
+def test_query_radius():
+    points = random_points(400)
+    queries = random_points(5, seed=4)
+    tree = VPTree(points, leaf_size=8)
+    found = tree.query_radius(queries, 1.5)
+    dist = distance_matrix(queries, points)
+    for i, idx in enumerate(found):
+        expected = np.flatnonzero(dist[i] <= 1.5)
+        if sorted(idx) != sorted(expected):
+            raise ValueError(f'Expected {expected}. Got {idx}.')
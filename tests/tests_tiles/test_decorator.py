@@ -0,0 +1,122 @@
+import re
+
+import numpy as np
+import pytest
+
+from hyperbolic.poincare import Point, Polygon, Transform
+from hyperbolic.tiles import (
+    Tile, TileDecorator, TileDecoratorOffset, TileDecoratorPolygons, TileGen,
+    TileLayout, TileSet,
+)
+
+
+DRAW_KWARGS = [
+    {},
+    {'hwidth': 0.05},
+    {'hwidth': (0.01, 0.04)},
+    {'hwidth': 0.03, 'transform': Transform.shift_origin(Point(0.3, 0.2))},
+]
+
+
+def path_parts(path):
+    d = path.args['d']
+    return (re.findall('[A-Z]', d),
+            np.array([float(x) for x in re.findall(r'[^A-Z ,]+', d)]))
+
+
+def reflected_tiles(tiles):
+    reflect = Transform.identity().conjugate()
+    return [Tile(reflect.apply_to_list(tile.vertices),
+                 trans=Transform.merge(tile.trans, reflect))
+            for tile in tiles]
+
+
+def check_paths(expected, found):
+    if len(found) != len(expected):
+        raise ValueError(f'Expected {len(expected)} paths. Got {len(found)}.')
+    for d1, d2 in zip(expected, found):
+        (cmds1, nums1), (cmds2, nums2) = path_parts(d1), path_parts(d2)
+        if (cmds1 != cmds2 or not np.allclose(nums1, nums2, atol=1e-7)
+                or d2.args['fill'] != 'red'):
+            raise ValueError(f'Expected {d1.args}. Got {d2.args}.')
+
+
+@pytest.mark.parametrize('kwargs', DRAW_KWARGS)
+def test_polygons_match_restore_points(kwargs):
+    dec = TileDecoratorPolygons(
+            Polygon.from_vertices([Point.from_h_polar(0.4, 10),
+                                   Point.from_h_polar(0.2, 100),
+                                   Point.from_h_polar(0.5, 250)]),
+            Polygon.from_vertices([Point.from_h_polar(0.4, 0),
+                                   Point.from_h_polar(0.4, 90),
+                                   Point.from_h_polar(0, 0)]))
+    layout = TileLayout()
+    layout.add_generator(TileGen.make_regular(5, q=4), (0,)*5, dec)
+    tiles = layout.tile_plane(layout.default_start_tile(), 2, out=TileSet())
+    # Include reflected tiles
+    reflected = [Tile(tile.vertices, trans=Transform.merge(
+                         tile.trans, Transform.identity().conjugate()))
+                 for tile in tiles.to_list()[:5]]
+    expected = [d for tile in tiles.to_list() + reflected
+                  for desc in dec.poly_descs
+                  for d in Polygon.from_restore_points(
+                          tile.trans.apply_to_list(desc)).to_drawables(
+                          fill='red', **kwargs)]
+    found = dec.tiles_to_drawables(tiles, fill='red', **kwargs)
+    found += [d for tile in reflected
+                for d in dec.to_drawables(tile, fill='red', **kwargs)]
+    if len(found) != len(expected):
+        raise ValueError(f'Expected {len(expected)} paths. Got {len(found)}.')
+    for d1, d2 in zip(expected, found):
+        (cmds1, nums1), (cmds2, nums2) = path_parts(d1), path_parts(d2)
+        if (cmds1 != cmds2 or not np.allclose(nums1, nums2, atol=1e-7)
+                or d2.args['fill'] != 'red'):
+            raise ValueError(f'Expected {d1.args}. Got {d2.args}.')
+
+
+def test_polygons_follow_changed_descs():
+    square = Polygon.from_vertices([Point.from_h_polar(0.3, 90*i)
+                                    for i in range(4)])
+    triangle = Polygon.from_vertices([Point.from_h_polar(0.5, 120*i)
+                                      for i in range(3)])
+    dec = TileDecoratorPolygons(square)
+    tiles = [TileGen.make_regular(5, q=4).center_tile]
+    dec.tiles_to_drawables(tiles, fill='red')
+    # Change the descriptor in place
+    dec.poly_descs[0][:] = triangle.make_restore_points()
+    check_paths(triangle.to_drawables(fill='red'),
+                dec.tiles_to_drawables(tiles, fill='red'))
+
+
+@pytest.mark.parametrize('offset', [0, 0.05, -0.03])
+@pytest.mark.parametrize('kwargs', DRAW_KWARGS)
+def test_outlines_match_offset_polygon(offset, kwargs):
+    dec = TileDecoratorOffset(offset) if offset else TileDecorator()
+    layout = TileLayout()
+    layout.add_generator(TileGen.make_regular(4, q=5), (0,)*4)
+    tiles = layout.tile_plane(layout.default_start_tile(rotate_deg=7), 2)
+    tiles += reflected_tiles(tiles[:5])
+    expected = []
+    for tile in tiles:
+        poly = tile.to_polygon()
+        if offset:
+            poly = poly.offset_polygon(offset)
+        expected.extend(poly.to_drawables(fill='red', **kwargs))
+    check_paths(expected, dec.tiles_to_drawables(tiles, fill='red', **kwargs))
+    check_paths(expected, [d for tile in tiles
+                             for d in dec.to_drawables(tile, fill='red',
+                                                       **kwargs)])
+    # Congruent tiles share outlines
+    if len(dec._outline_cache) != 2:
+        raise ValueError(f'Expected 2 outlines. Got {len(dec._outline_cache)}.')
+
+
+def test_outline_cache_keeps_recent_outlines():
+    dec = TileDecorator()
+    dec.max_outlines = 2
+    tiles = {p: TileGen.make_regular(p, q=8).center_tile for p in (3, 4, 5)}
+    for p in (3, 4, 3, 5):
+        dec.tiles_to_drawables([tiles[p]], hwidth=0.01)
+    sides = sorted(len(verts) for _, verts, _, _ in dec._outline_cache)
+    if sides != [3, 5]:
+        raise ValueError(f'Expected outlines of 3 and 5 sides. Got {sides}.')
@@ -0,0 +1,27 @@
+import numpy as np
+import pytest
+
+from hyperbolic.tiles import TileSet
+
+from .test_tile_layout import LAYOUTS, tile_key
+
+
+@pytest.mark.parametrize('layout,depth', [LAYOUTS[0], LAYOUTS[-1]])
+@pytest.mark.parametrize('workers', [2, 3])
+def test_tile_plane_parallel_matches_tile_plane(layout, depth, workers):
+    start_tile = layout.default_start_tile(rotate_deg=10)
+    for kwargs in (dict(depth=depth), dict(depth=None, min_size=0.03)):
+        expected = layout.tile_plane(start_tile, **kwargs)
+        tile_set = TileSet()
+        tile_set.append(start_tile)
+        layout.tile_plane_parallel(start_tile, out=tile_set, workers=workers,
+                                   **kwargs)
+        keys = sorted(tile_key(tile) for tile in tile_set.to_list()[1:])
+        expected_keys = sorted(tile_key(tile) for tile in expected)
+        if keys != expected_keys:
+            raise ValueError(f'Expected {len(expected)} tiles. '
+                             f'Got {len(keys)}.')
+        parent = tile_set.parent
+        if parent[1] != -1 or not np.all(
+                (parent[2:] >= 1) & (parent[2:] < np.arange(2, len(parent)))):
+            raise ValueError(f'Expected earlier parents. Got {parent}.')
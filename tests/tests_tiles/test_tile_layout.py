@@ -0,0 +1,315 @@
+import itertools
+import math
+import random
+
+import pytest
+
+from hyperbolic.poincare import Point, Transform
+from hyperbolic.poincare.util import triangle_side_for_angles
+from hyperbolic.tiles import (
+    Edge, EdgeMap, TileAdjacency, TileGen, TileLayout, TileSet, Tiling,
+    tile_bounding_circle, tile_size,
+)
+from hyperbolic.util import epsilon
+
+
+def list_tile_plane(layout, start_tile, depth):
+    '''The list-based tile_plane that compared neighbouring edges directly.'''
+    tiles = [start_tile]
+    boundary = list(start_tile.sides)
+    for j in range(depth):
+        boundary2 = []
+        i = 0
+        while i < len(boundary):
+            tile = layout.place_tile(boundary[i])
+            tiles.append(tile)
+            sides = tile.permuted_sides()
+            o = 1
+            p = len(sides)
+            if i == 0:
+                if sides[o] == boundary[-1]:
+                    o += 1
+                    boundary.pop()
+            else:
+                if sides[o] == boundary2[-1]:
+                    o += 1
+                    boundary2.pop()
+                if sides[p-1] == boundary[(i + 1) % len(boundary)]:
+                    p -= 1
+                    i += 1
+                if sides[p-1] == boundary2[0]:
+                    p -= 1
+                    boundary2.pop(0)
+            boundary2.extend(sides[o:p])
+            i += 1
+        boundary = boundary2
+    return tiles
+
+
+def regular_layout(p, q):
+    layout = TileLayout()
+    layout.add_generator(TileGen.make_regular(p, q=q), (0,)*p)
+    return layout
+
+
+def triangle_square_layout():
+    p1, p2, q = 4, 3, 3
+    theta1, theta2 = math.pi*2/p1, math.pi*2/p2
+    phi_sum = math.pi*2/q
+    r1 = triangle_side_for_angles(theta1/2, phi_sum/2, theta2/2)
+    r2 = triangle_side_for_angles(theta2/2, phi_sum/2, theta1/2)
+    layout = TileLayout()
+    layout.add_generator(TileGen.make_regular(p1, hr=r1), (1,)*p1)
+    layout.add_generator(TileGen.make_regular(p2, hr=r2), (0,)*p2)
+    return layout
+
+
+LAYOUTS = [
+    (regular_layout(7, 3), 5),
+    (regular_layout(4, 5), 5),
+    (regular_layout(3, 7), 7),
+    (regular_layout(6, 4), 4),
+    (triangle_square_layout(), 6),
+]
+
+
+@pytest.mark.parametrize('layout,depth', LAYOUTS)
+def test_tile_plane_matches_list_version(layout, depth):
+    start_tile = layout.default_start_tile(rotate_deg=10)
+    tiles = layout.tile_plane(start_tile, depth=depth)
+    expected = list_tile_plane(layout, start_tile, depth)
+    if len(tiles) != len(expected):
+        raise ValueError(f'Expected {len(expected)} tiles. Got {len(tiles)}.')
+    for tile, other in zip(tiles, expected):
+        if tile.vertices != other.vertices:
+            raise ValueError(f'Expected {other.vertices}. Got {tile.vertices}.')
+
+
+def test_edge_map_across_cell_border():
+    border = EdgeMap.cell_size * 3
+    p1, p2 = Point(border - epsilon/2, 0.1), Point(0.2, -0.3)
+    q1, q2 = Point(border + epsilon/2, 0.1), Point(0.2, -0.3)
+    edge, other = Edge(p1, p2), Edge(q2, q1)
+    edges = EdgeMap([edge])
+    if edges.find(other) is not edge:
+        raise ValueError('Expected edges across a cell border to match.')
+    if edges.pop(Edge(Point(border + 3*epsilon, 0.1), p2)) is not None:
+        raise ValueError('Expected distant edges not to match.')
+    if edges.pop(other) is not edge or len(edges) != 0:
+        raise ValueError('Expected the matching edge to be removed.')
+
+
+class TileLayoutTwisted(TileLayout):
+    def calc_gen_index(self, code):
+        return 0
+    def calc_tile_touch_side(self, code, gen_index):
+        return code % 3
+    def calc_side_codes(self, code, gen_index, touch_side, default_codes):
+        return [code + i + 1 for i in range(len(default_codes))]
+
+
+@pytest.mark.parametrize('layout,depth', LAYOUTS[:4] + [
+    (TileLayoutTwisted([[TileGen.make_regular(5, q=4), (0,)*5, None]]), 5),
+])
+def test_iter_regular_tiles_matches_tile_plane(layout, depth):
+    for start_tile in (layout.default_start_tile(rotate_deg=10),
+                       layout.default_start_tile(center_corner=True)):
+        tiles = list(layout.iter_regular_tiles(start_tile, depth=depth))
+        expected = layout.tile_plane(start_tile, depth=depth)
+        if len(tiles) != len(expected):
+            raise ValueError(f'Expected {len(expected)} tiles. '
+                             f'Got {len(tiles)}.')
+        for tile, other in zip(tiles, expected):
+            if tile.vertices != other.vertices:
+                raise ValueError(f'Expected {other.vertices}. '
+                                 f'Got {tile.vertices}.')
+            codes = [side.code for side in tile.sides]
+            other_codes = [side.code for side in other.sides]
+            if codes != other_codes:
+                raise ValueError(f'Expected {other_codes}. Got {codes}.')
+
+
+def test_iter_regular_tiles_requires_regular_tile():
+    with pytest.raises(ValueError):
+        start_tile = LAYOUTS[-1][0].default_start_tile()
+        next(LAYOUTS[-1][0].iter_regular_tiles(start_tile))
+    layout = TileLayout()
+    layout.add_generator(TileGen.make_regular(5, hr=1.3), (0,)*5)
+    with pytest.raises(ValueError):
+        next(layout.iter_regular_tiles(layout.default_start_tile()))
+
+
+def test_iter_tiles_streams():
+    layout = regular_layout(7, 3)
+    start_tile = layout.default_start_tile()
+    expected = layout.tile_plane(start_tile, depth=4)
+    tiles = list(itertools.islice(layout.iter_tiles(start_tile), 100))
+    if [t.vertices for t in tiles] != [t.vertices for t in expected[:100]]:
+        raise ValueError('Expected the first 100 tiles of tile_plane.')
+    rings = list(layout.iter_tiles(start_tile, depth=4, rings=True))
+    sizes = [len(ring) for ring in rings]
+    tiles = sum(rings, [])
+    if sizes != [1, 7, 21, 56, 147] or (
+            [t.vertices for t in tiles] != [t.vertices for t in expected]):
+        raise ValueError(f'Expected rings of tile_plane. Got sizes {sizes}.')
+
+
+def tile_key(tile):
+    return tuple(sorted((round(v.x, 8), round(v.y, 8)) for v in tile.vertices))
+
+
+def test_tile_plane_min_size():
+    layout = regular_layout(7, 3)
+    start_tile = layout.default_start_tile()
+    min_size = 0.03
+    tiles = layout.tile_plane(start_tile, depth=None, min_size=min_size)
+    keys = {tile_key(tile) for tile in tiles}
+    if len(keys) != len(tiles):
+        raise ValueError(f'Expected {len(tiles)} unique tiles. '
+                         f'Got {len(keys)}.')
+    # Every tile at least min_size across is found
+    for tile in layout.tile_plane(start_tile, depth=6):
+        if tile_size(tile) >= min_size and tile_key(tile) not in keys:
+            raise ValueError(f'Expected tile {tile.vertices}.')
+
+    with pytest.raises(ValueError):
+        layout.tile_plane(start_tile, depth=None)
+    with pytest.raises(ValueError):
+        layout.tile_plane_parallel(start_tile, depth=None)
+
+
+HALF_PLANE = Transform.merge(
+    Transform.mirror((1, 0)),
+    Transform.disk_to_half(),
+    Transform.translation((-0.00001, 0)),
+    Transform.mirror((1, 0)),
+)
+
+
+def tile_meets_box(tile, box, transform):
+    circle = tile_bounding_circle(tile, transform)
+    if circle is None:
+        return True
+    center, r = circle
+    x, y = center.real, center.imag
+    return math.hypot(max(box[0] - x, 0, x - box[2]),
+                      max(box[1] - y, 0, y - box[3])) <= r
+
+
+@pytest.mark.parametrize('viewport,transform', [
+    ((0.5, 0.3, 0.8, 0.6), None),
+    ((0.95, -0.05, 1.2, 0.05), None),
+    ((2, 2, 3, 3), None),
+    ((-0.3, -0.3, 0.3, 0.3), Transform.translation((0.6, 0.3))),
+    ((-0.5, -1.2, 0.5, -0.2), HALF_PLANE),
+])
+def test_tile_plane_viewport(viewport, transform):
+    layout = regular_layout(7, 3)
+    start_tile = layout.default_start_tile()
+    kwargs = dict(depth=6, min_size=0.01, transform=transform)
+    tiles = layout.tile_plane(start_tile, viewport=viewport, **kwargs)
+    expected = [tile for tile in layout.tile_plane(start_tile, **kwargs)
+                if tile_meets_box(tile, viewport, transform)]
+    keys = sorted(tile_key(tile) for tile in tiles)
+    expected_keys = sorted(tile_key(tile) for tile in expected)
+    if keys != expected_keys:
+        raise ValueError(f'Expected {len(expected)} visible tiles. '
+                         f'Got {len(tiles)}.')
+
+
+@pytest.mark.parametrize('layout,depth', LAYOUTS)
+def test_tile_plane_random_viewports(layout, depth):
+    rng = random.Random(depth)
+    start_tile = layout.default_start_tile(rotate_deg=10)
+    for kwargs in (dict(depth=depth - 1), dict(depth=None, min_size=0.05)):
+        all_tiles = layout.tile_plane(start_tile, **kwargs)
+        for _ in range(10):
+            x, y = rng.uniform(-1, 0.9), rng.uniform(-1, 0.9)
+            viewport = (x, y, x + rng.uniform(0.02, 0.5),
+                        y + rng.uniform(0.02, 0.5))
+            tiles = layout.tile_plane(start_tile, viewport=viewport, **kwargs)
+            keys = sorted(tile_key(tile) for tile in tiles)
+            expected_keys = sorted(tile_key(tile) for tile in all_tiles
+                                   if tile_meets_box(tile, viewport, None))
+            if keys != expected_keys:
+                raise ValueError(f'Expected {len(expected_keys)} tiles in '
+                                 f'{viewport}. Got {len(keys)}.')
+
+
+@pytest.mark.parametrize('layout', [LAYOUTS[0][0], LAYOUTS[-1][0]])
+@pytest.mark.parametrize('kwargs', [
+    {}, dict(viewport=(0.2, 0.1, 0.6, 0.5)), dict(min_size=0.1),
+])
+def test_tile_plane_adjacency(layout, kwargs):
+    start_tile = layout.default_start_tile(rotate_deg=10)
+    adjacency = TileAdjacency()
+    tiles = layout.tile_plane(start_tile, depth=4, adjacency=adjacency,
+                              **kwargs)
+    pairs = {(i, side, j, other_side)
+             for i in range(len(tiles))
+             for side, j, other_side in adjacency.neighbors(i)}
+    expected = {(i, side, j, other_side)
+                for (i, tile), (j, other) in itertools.permutations(
+                        enumerate(tiles), 2)
+                for side, edge in enumerate(tile.sides)
+                for other_side, other_edge in enumerate(other.sides)
+                if edge == other_edge}
+    if len(adjacency) != len(tiles) or pairs != expected:
+        raise ValueError(f'Expected {len(expected)} neighbours. '
+                         f'Got {len(pairs)}.')
+
+
+def test_tiling_extend():
+    layout = regular_layout(7, 3)
+    start_tile = layout.default_start_tile()
+    expected = [tile.vertices for tile in layout.tile_plane(start_tile, 5)]
+    tiling = Tiling(layout, start_tile)
+    tiling.extend(3)
+    if tiling.depth != 3 or len(tiling) != 85:
+        raise ValueError(f'Expected 85 tiles in 3 rings. Got {tiling}.')
+    # Stop partway through a ring and continue
+    if tiling.extend(2, max_tiles=100) != 100 or tiling.depth != 3:
+        raise ValueError(f'Expected 100 more tiles. Got {tiling}.')
+    tiling.extend(2)
+    if tiling.depth != 5 or [t.vertices for t in tiling.tiles] != expected:
+        raise ValueError(f'Expected the tiles of tile_plane. Got {tiling}.')
+    tile_set = TileSet()
+    tiling = Tiling(layout, start_tile, out=tile_set)
+    tiling.extend(None, max_bytes=20000)
+    if not 0 < tile_set.nbytes - 20000 < tile_set.nbytes / 2:
+        raise ValueError(f'Expected to stop at 20000 bytes. '
+                         f'Got {tile_set.nbytes}.')
+
+
+@pytest.mark.parametrize('layout,depth', LAYOUTS[-2:])
+def test_compile_rules(layout, depth):
+    start_tile = layout.default_start_tile(rotate_deg=10)
+    expected = layout.tile_plane(start_tile, depth=depth)
+    layout.compile_rules()
+    try:
+        tiles = layout.tile_plane(start_tile, depth=depth)
+    finally:
+        layout._rules = None
+    if len(tiles) != len(expected):
+        raise ValueError(f'Expected {len(expected)} tiles. Got {len(tiles)}.')
+    for tile, other in zip(tiles, expected):
+        codes = [side.code for side in tile.sides]
+        other_codes = [side.code for side in other.sides]
+        if tile.vertices != other.vertices or codes != other_codes:
+            raise ValueError(f'Expected {other.vertices} {other_codes}. '
+                             f'Got {tile.vertices} {codes}.')
+
+
+def test_compile_rules_infinite_codes():
+    layout = TileLayoutTwisted([[TileGen.make_regular(5, q=4), (0,)*5, None]])
+    with pytest.raises(ValueError):
+        layout.compile_rules(max_codes=100)
+    # Only the given codes are compiled
+    start_tile = layout.default_start_tile()
+    expected = layout.tile_plane(start_tile, depth=3)
+    layout.compile_rules(codes=range(4))
+    if len(layout._rules) != 4:
+        raise ValueError(f'Expected 4 rules. Got {len(layout._rules)}.')
+    tiles = layout.tile_plane(start_tile, depth=3)
+    if [t.vertices for t in tiles] != [t.vertices for t in expected]:
+        raise ValueError('Expected the same tiles with partial rules.')
@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+
+from hyperbolic.poincare import PointArray
+from hyperbolic.tiles import TileAdjacency, TileLocator, TileSet
+
+from .test_tile_layout import LAYOUTS
+
+
+@pytest.mark.parametrize('layout,depth', [LAYOUTS[0], LAYOUTS[1], LAYOUTS[2]])
+def test_locate_matches_nearest_center(layout, depth):
+    tile_set, adjacency = TileSet(), TileAdjacency()
+    layout.tile_plane(layout.default_start_tile(rotate_deg=10), depth=depth,
+                      out=tile_set, adjacency=adjacency)
+    locator = TileLocator(tile_set, adjacency)
+    rng = np.random.default_rng(0)
+    z = np.sqrt(rng.random(500)) * 0.85 * np.exp(2j*np.pi*rng.random(500))
+    found = locator.locate_array(PointArray(z))
+    # A regular tile contains the points closer to its center than to the
+    # center of any other tile
+    centers = tile_set.transforms.apply_to_array(np.zeros(len(tile_set)))
+    dist = abs((z[:, None] - centers) / (1 - centers.conjugate()*z[:, None]))
+    expected = np.argmin(dist, axis=1)
+    if not np.array_equal(found, expected):
+        raise ValueError(f'Expected {expected}. Got {found}.')
+    starts = np.arange(len(z)) % len(tile_set)
+    if not np.array_equal(locator.locate_array(z, start=starts), found):
+        raise ValueError('Expected the same tiles from any start tile.')
+    if locator.locate((0, 0)) != 0 or locator.locate(1.5+0j) != -1:
+        raise ValueError('Expected the start tile and no tile outside.')
+
+
+@pytest.mark.parametrize('search_chunk', [TileLocator.search_chunk, 1])
+@pytest.mark.parametrize('min_size', [0.05, 0.03])
+def test_locate_in_tiling_that_is_not_convex(min_size, search_chunk):
+    layout = LAYOUTS[-1][0]
+    tile_set, adjacency = TileSet(), TileAdjacency()
+    layout.tile_plane(layout.default_start_tile(rotate_deg=10), depth=None,
+                      min_size=min_size, out=tile_set, adjacency=adjacency)
+    locator = TileLocator(tile_set, adjacency)
+    # A chunk of 1 searches one lost point at a time
+    locator.search_chunk = search_chunk
+    centers = tile_set.transforms.apply_to_array(np.zeros(len(tile_set)))
+    found = locator.locate_array(centers)
+    if not np.array_equal(found, np.arange(len(tile_set))):
+        missed = np.flatnonzero(found != np.arange(len(tile_set)))
+        raise ValueError(f'Expected the tile of each center. '
+                         f'Got {found[missed]} for tiles {missed}.')
+    if locator.locate(0.999+0j) != -1:
+        raise ValueError('Expected no tile near the edge of the disk.')
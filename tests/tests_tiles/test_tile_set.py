@@ -0,0 +1,119 @@
+import numpy as np
+
+from hyperbolic.tiles import (
+    TileCache, TileDecoratorNull, TileGen, TileLayout, TileSet,
+)
+
+
+class TileLayoutListCodes(TileLayout):
+    def calc_gen_index(self, code):
+        return 0
+    def calc_side_codes(self, code, gen_index, touch_side, default_codes):
+        # Unhashable codes
+        return [[i, code] for i in range(len(default_codes))]
+
+
+class TileLayoutTwisted(TileLayout):
+    def __init__(self, twist):
+        super().__init__()
+        self.twist = twist
+    def calc_tile_touch_side(self, code, gen_index):
+        return self.twist
+    def cache_params(self):
+        return self.twist
+
+
+def make_layout(layout_type=TileLayout):
+    layout = layout_type()
+    layout.add_generator(TileGen.make_regular(5, q=4), (0,)*5,
+                         TileDecoratorNull())
+    return layout
+
+
+def test_tile_set_matches_tile_list():
+    for layout in (make_layout(), make_layout(TileLayoutListCodes)):
+        start_tile = layout.default_start_tile(rotate_deg=10)
+        tiles = layout.tile_plane(start_tile, depth=3)
+        tile_set = layout.tile_plane(start_tile, depth=3, out=TileSet())
+        if len(tile_set) != len(tiles):
+            raise ValueError(f'Expected {len(tiles)} tiles. '
+                             f'Got {len(tile_set)}.')
+        for tile, other in zip(tile_set, tiles):
+            if tile.vertices != other.vertices:
+                raise ValueError(f'Expected {other.vertices}. '
+                                 f'Got {tile.vertices}.')
+            codes = [side.code for side in tile.sides]
+            other_codes = [side.code for side in other.sides]
+            if codes != other_codes:
+                raise ValueError(f'Expected {other_codes}. Got {codes}.')
+            if (tile.decorator is not other.decorator
+                    or tile.touching_side != other.touching_side):
+                raise ValueError('Expected the same decorator and side.')
+            z = np.array([complex(*v) for v in other.vertices])
+            if not np.allclose(tile.trans.apply_to_array(z),
+                               other.trans.apply_to_array(z)):
+                raise ValueError(f'Expected {other.trans}. Got {tile.trans}.')
+
+
+def test_tile_set_columns():
+    layout = make_layout()
+    tile_set = TileSet()
+    tile_set.append(TileGen.make_regular(3, q=7).center_tile)
+    layout.tile_plane(layout.default_start_tile(), depth=2, out=tile_set)
+    n = len(tile_set)
+    if tile_set.vertices.shape != (n, 5, 2) or tile_set.side_codes.shape != (
+            n, 5):
+        raise ValueError(f'Unexpected shapes {tile_set.vertices.shape} and '
+                         f'{tile_set.side_codes.shape}.')
+    if not np.isnan(tile_set.vertices[0, 3:]).all():
+        raise ValueError('Expected missing vertices to be nan.')
+    if list(tile_set.n_sides[:2]) != [3, 5]:
+        raise ValueError(f'Expected [3, 5]. Got {tile_set.n_sides[:2]}.')
+    parent = tile_set.parent
+    if parent[0] != -1 or parent[1] != -1 or not np.all(parent[2:7] == 1):
+        raise ValueError(f'Expected the first ring parent to be 1. '
+                         f'Got {parent}.')
+    if not np.all(parent[2:] < np.arange(2, n)):
+        raise ValueError('Expected parents to come before children.')
+    if not np.all(tile_set.gen_index[2:] == 0):
+        raise ValueError(f'Expected generator 0. Got {tile_set.gen_index}.')
+    rows = tile_set[2:7]
+    if len(rows) != 5 or not np.array_equal(rows.vertices,
+                                            tile_set.vertices[2:7],
+                                            equal_nan=True):
+        raise ValueError(f'Expected rows 2 to 7. Got {rows.vertices}.')
+    if rows[0].vertices != tile_set[2].vertices:
+        raise ValueError(f'Expected {tile_set[2].vertices}. '
+                         f'Got {rows[0].vertices}.')
+
+
+def test_tile_cache(tmp_path):
+    layout = make_layout(TileLayoutListCodes)
+    start_tile = layout.default_start_tile(rotate_deg=10)
+    cache = TileCache(str(tmp_path))
+    tile_set = cache.tile_plane(layout, start_tile, depth=3)
+    if len(list(tmp_path.iterdir())) != 1:
+        raise ValueError('Expected one saved tiling.')
+    loaded = cache.tile_plane(layout, start_tile, depth=3)
+    if not isinstance(loaded.vertices, np.memmap):
+        raise ValueError('Expected a memory-mapped tiling.')
+    if not np.array_equal(loaded.vertices, tile_set.vertices, equal_nan=True):
+        raise ValueError('Expected the saved vertices.')
+    for tile, other in zip(loaded, tile_set):
+        codes = [side.code for side in tile.sides]
+        other_codes = [side.code for side in other.sides]
+        if codes != other_codes or tile.decorator is not other.decorator:
+            raise ValueError(f'Expected {other_codes}. Got {codes}.')
+    cache.tile_plane(layout, start_tile, depth=2)
+    cache.tile_plane(layout, layout.default_start_tile(), depth=3)
+    if len(list(tmp_path.iterdir())) != 3:
+        raise ValueError('Expected a new tiling for each set of parameters.')
+    for twist in (1, 2):
+        layout = TileLayoutTwisted(twist)
+        layout.add_generator(TileGen.make_regular(5, q=4), (0,)*5)
+        start_tile = layout.default_start_tile(rotate_deg=10)
+        loaded = cache.tile_plane(layout, start_tile, depth=3)
+        expected = layout.tile_plane(start_tile, depth=3, out=TileSet())
+        if not np.array_equal(loaded.vertices, expected.vertices,
+                              equal_nan=True):
+            raise ValueError(f'Expected the tiling with twist {twist}.')